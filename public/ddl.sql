@@ -318,4 +318,47 @@ CREATE TABLE IF NOT EXISTS public.cashflows (
     gain_loss_on_sale_of_business NUMERIC,
     net_income_from_continuing_operations NUMERIC,
     CONSTRAINT fk_ticker FOREIGN KEY (ticker_id) REFERENCES tickers (id) ON DELETE SET NULL
+);
+
+CREATE TABLE IF NOT EXISTS public.ingestion_state (
+    ticker_id INT NOT NULL REFERENCES tickers(id) ON DELETE CASCADE,
+    dataset VARCHAR(32) NOT NULL,
+    last_fetched_at TIMESTAMPTZ NOT NULL,
+    latest_date DATE,
+    content_hash VARCHAR(32),
+    PRIMARY KEY (ticker_id, dataset)
+);
+
+ALTER TABLE public.ingestion_state ADD COLUMN IF NOT EXISTS content_hash VARCHAR(32);
+
+CREATE TABLE IF NOT EXISTS public.prices (
+    ticker_id INT NOT NULL REFERENCES tickers(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    open NUMERIC,
+    high NUMERIC,
+    low NUMERIC,
+    close NUMERIC NOT NULL,
+    adj_close NUMERIC,
+    volume BIGINT,
+    PRIMARY KEY (ticker_id, date)
+) PARTITION BY RANGE (date);
+
+-- Yearly partitions (prices_YYYY) are created by the loader as data arrives.
+-- The loader sorts each COPY batch by date, so a BRIN index keeps range scans cheap at a fraction of a B-tree's size.
+CREATE INDEX IF NOT EXISTS prices_date_brin ON public.prices USING BRIN (date);
+
+-- Append-only landing zone of raw yfinance payloads. Large JSONB values are compressed by TOAST.
+CREATE TABLE IF NOT EXISTS public.raw_payloads (
+    ticker_id INT NOT NULL REFERENCES tickers(id) ON DELETE CASCADE,
+    dataset VARCHAR(32) NOT NULL,
+    fetched_at TIMESTAMPTZ NOT NULL,
+    payload JSONB NOT NULL,
+    PRIMARY KEY (ticker_id, dataset, fetched_at)
+);
+
+-- Fingerprints of the applied DDL and seeded reference data, used to skip unchanged setup steps
+CREATE TABLE IF NOT EXISTS public.schema_version (
+    component VARCHAR(64) PRIMARY KEY,
+    fingerprint JSONB NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
 );
\ No newline at end of file
@@ -0,0 +1,44 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from metrics import TICKERS_IN_FLIGHT, TICKERS_PROCESSED, record_error
+
+
+async def ingest_tickers_async(symbols, fetch, write, fetch_threads=64, write_threads=4):
+    """
+    Ingest tickers from an asyncio event loop on two thread pools.
+
+    yfinance is blocking, so this is a thread-pool variant of the concurrent ingestion
+    driven by asyncio: fetch(symbol) calls run on a fetch_threads executor, which bounds
+    how many tickers are fetched at once, and write(symbol, payloads) runs on a separate,
+    smaller executor so slow database writes never hold up network fetches. A semaphore
+    admits at most fetch_threads + write_threads tickers, so fetched payloads waiting
+    for a writer stay bounded. Errors are logged per ticker and never stop the run.
+    Returns the number of tickers that succeeded and the symbols that failed.
+    """
+    semaphore = asyncio.Semaphore(fetch_threads + write_threads)
+    loop = asyncio.get_running_loop()
+
+    with ThreadPoolExecutor(max_workers=fetch_threads, thread_name_prefix="async-fetch") as fetch_executor, \
+            ThreadPoolExecutor(max_workers=write_threads, thread_name_prefix="async-write") as write_executor:
+
+        async def ingest(symbol):
+            async with semaphore:
+                TICKERS_IN_FLIGHT.inc()
+                try:
+                    payloads = await loop.run_in_executor(fetch_executor, fetch, symbol)
+                    await loop.run_in_executor(write_executor, write, symbol, payloads)
+                    TICKERS_PROCESSED.labels(outcome="succeeded").inc()
+                    return True
+                except Exception as e:
+                    logging.error(f"Failed to process ticker {symbol}: {e}")
+                    record_error("ticker", e)
+                    TICKERS_PROCESSED.labels(outcome="failed").inc()
+                    return False
+                finally:
+                    TICKERS_IN_FLIGHT.dec()
+
+        results = await asyncio.gather(*(ingest(symbol) for symbol in symbols))
+
+    failed = [symbol for symbol, ok in zip(symbols, results) if not ok]
+    return len(results) - len(failed), failed
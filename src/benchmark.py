@@ -0,0 +1,253 @@
+from db_utils import (
+    close_connection_pool,
+    create_tables,
+    get_db_connection,
+    insert_industry_data,
+    insert_sector_data,
+    insert_tickers_data,
+    load_ingestion_state,
+    load_ticker_id_cache,
+    pooled_connection,
+)
+from providers import SyntheticProvider, set_data_provider, synthetic_symbols
+from scheduler import collect_flush_failures, get_write_buffers, process_ticker_data
+from concurrent.futures import ThreadPoolExecutor
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import resource
+import time
+
+DEFAULT_SIZES = (100, 1000, 5000)
+
+# Tables written per ticker; 'tickers' rows are updated in place rather than inserted
+BENCHMARK_TABLES = ("company", "financial_metrics", "dividends", "balance_sheets", "cashflows", "ingestion_state")
+
+
+def create_benchmark_database(name):
+    """
+    (Re)create an empty database for the benchmark on the server configured by the
+    DB_* environment variables, and point DB_NAME at it.
+    """
+    conn = get_db_connection()
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(name)))
+            cursor.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(name)))
+    finally:
+        conn.close()
+    os.environ["DB_NAME"] = name
+    logging.info(f"Created benchmark database '{name}'.")
+
+def drop_benchmark_database(name, admin_database):
+    """
+    Drop the benchmark database, connecting through admin_database.
+    """
+    close_connection_pool()
+    os.environ["DB_NAME"] = admin_database
+    conn = get_db_connection()
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(name)))
+    finally:
+        conn.close()
+    logging.info(f"Dropped benchmark database '{name}'.")
+
+def seed_database(symbols):
+    """
+    Create the tables, load the reference data from public/Equity.csv and add the
+    synthetic tickers so payloads for them can be written.
+    """
+    create_tables()
+    insert_industry_data()
+    insert_sector_data()
+    insert_tickers_data()
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            execute_values(
+                cursor,
+                "INSERT INTO tickers (ticker, security_name) VALUES %s ON CONFLICT DO NOTHING",
+                [(symbol, f"{symbol} Limited") for symbol in symbols],
+            )
+        load_ticker_id_cache(conn)
+
+def reset_tables():
+    """
+    Empty the tables written by a run, including the ingestion watermarks, so every
+    size starts from the same state and ingests every dataset.
+    """
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("TRUNCATE {}").format(
+                sql.SQL(", ").join(sql.Identifier(table) for table in BENCHMARK_TABLES)
+            ))
+            cursor.execute("UPDATE tickers SET last_price = NULL")
+        load_ingestion_state(conn)
+
+def count_rows():
+    """
+    Return the number of rows in each benchmarked table, plus the number of tickers
+    whose fast-info columns were updated.
+    """
+    counts = {}
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            for table in BENCHMARK_TABLES:
+                cursor.execute(sql.SQL("SELECT count(*) FROM {}").format(sql.Identifier(table)))
+                counts[table] = cursor.fetchone()[0]
+            cursor.execute("SELECT count(*) FROM tickers WHERE last_price IS NOT NULL")
+            counts["tickers"] = cursor.fetchone()[0]
+    return counts
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a list of numbers.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process so far, in megabytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+def run_size(symbols, max_workers, write_behind):
+    """
+    Ingest the given synthetic tickers once and return the measurements of the run.
+    """
+    reset_tables()
+    buffers = get_write_buffers(write_behind)
+    latencies = []
+
+    def timed(symbol):
+        started = time.perf_counter()
+        ok = process_ticker_data((None, symbol), buffers)
+        latencies.append(time.perf_counter() - started)
+        return ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="benchmark") as executor:
+        results = list(executor.map(timed, symbols))
+    succeeded = sum(results)
+    if buffers is not None:
+        succeeded, _ = collect_flush_failures(buffers, succeeded, [])
+    elapsed = time.perf_counter() - started
+
+    rows = count_rows()
+    return {
+        "tickers": len(symbols),
+        "succeeded": succeeded,
+        "elapsed_seconds": round(elapsed, 3),
+        "tickers_per_second": round(len(symbols) / elapsed, 2),
+        "rows": rows,
+        "rows_per_second": {table: round(count / elapsed, 2) for table, count in rows.items()},
+        "latency_seconds": {
+            "p50": round(percentile(latencies, 0.50), 4),
+            "p99": round(percentile(latencies, 0.99), 4),
+            "max": round(max(latencies), 4),
+        },
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+def run_benchmark(sizes=DEFAULT_SIZES, max_workers=8, write_behind=False, latency=0.0, seed=0,
+                  database="ingest_benchmark", keep_database=False):
+    """
+    Benchmark the ingestion path end to end against a throwaway PostgreSQL database,
+    driving it with synthetic payloads for each ticker count in sizes.
+    Sizes run in ascending order, so peak RSS is the peak up to and including each size.
+    """
+    admin_database = os.getenv("DB_NAME")
+    sizes = sorted(sizes)
+    symbols = synthetic_symbols(sizes[-1])
+    set_data_provider(SyntheticProvider(seed=seed, latency=latency))
+
+    create_benchmark_database(database)
+    try:
+        seed_database(symbols)
+        runs = []
+        for size in sizes:
+            logging.info(f"Benchmarking {size} tickers...")
+            result = run_size(symbols[:size], max_workers, write_behind)
+            logging.info(
+                f"{size} tickers: {result['tickers_per_second']} tickers/s, "
+                f"p50 {result['latency_seconds']['p50']}s, p99 {result['latency_seconds']['p99']}s, "
+                f"peak RSS {result['peak_rss_mb']} MB."
+            )
+            runs.append(result)
+    finally:
+        if keep_database:
+            close_connection_pool()
+        else:
+            drop_benchmark_database(database, admin_database)
+
+    return {
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "settings": {
+            "max_workers": max_workers,
+            "write_behind": write_behind,
+            "provider_latency": latency,
+            "seed": seed,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "runs": runs,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ticker ingestion against a local PostgreSQL.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Ticker counts to benchmark.")
+    parser.add_argument("--workers", type=int, default=8, help="Ingestion worker threads.")
+    parser.add_argument("--write-behind", action="store_true", help="Buffer rows and write them in batches.")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Simulated provider latency per dataset, in seconds.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic payloads.")
+    parser.add_argument("--database", default="ingest_benchmark", help="Name of the throwaway database.")
+    parser.add_argument("--keep-database", action="store_true", help="Keep the database after the run.")
+    parser.add_argument("--output", help="JSON results file (default benchmarks/<timestamp>.json).")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        sizes=args.sizes,
+        max_workers=args.workers,
+        write_behind=args.write_behind,
+        latency=args.latency,
+        seed=args.seed,
+        database=args.database,
+        keep_database=args.keep_database,
+    )
+
+    output = args.output or os.path.join(
+        "benchmarks", f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+    logging.info(f"Benchmark results written to {output}.")
+
+def quiet_ingest_logging():
+    """
+    Drop INFO records from every module but this one, since per-ticker ingestion
+    logging would dominate the measurements.
+    """
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(lambda record: record.levelno >= logging.WARNING or record.module == "benchmark")
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.INFO)
+    quiet_ingest_logging()
+    main()
@@ -0,0 +1,208 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from psycopg2 import extensions
+
+
+class PoolError(Exception):
+    """
+    Raised when a connection cannot be checked out of the pool.
+    """
+
+
+class PoolTimeout(PoolError):
+    """
+    Raised when no connection becomes available within the checkout timeout.
+    """
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of PostgreSQL connections shared by all database writers.
+
+    Connections are created lazily up to max_size, with min_size opened up front.
+    A connection that sat idle for longer than health_check_interval seconds is
+    probed with 'SELECT 1' before it is handed out, and broken connections are
+    replaced transparently. Callers block for at most timeout seconds when every
+    connection is checked out.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=30.0, health_check_interval=30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1.")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._open = 0
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "health_check_failures": 0,
+        }
+
+        for _ in range(min_size):
+            self._idle.append((self._open_connection(), time.monotonic()))
+            self._open += 1
+
+    def _open_connection(self):
+        conn = self._connect()
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        return conn
+
+    def _close_connection(self, conn):
+        try:
+            conn.close()
+        except Exception as e:
+            logging.warning(f"Failed to close pooled connection: {e}")
+        self._stats["connections_closed"] += 1
+
+    def _is_healthy(self, conn, last_used):
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception as e:
+            logging.warning(f"Pooled connection failed health check: {e}")
+            return False
+
+    def getconn(self):
+        """
+        Check a connection out of the pool, opening a new one if the pool is below max_size.
+        Raises PoolTimeout if none becomes available within the checkout timeout.
+        """
+        deadline = time.monotonic() + self.timeout
+        wait_started = None
+
+        with self._cond:
+            try:
+                while True:
+                    if self._closed:
+                        raise PoolError("Connection pool is closed.")
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._open < self.max_size:
+                        self._open += 1
+                        conn, last_used = None, None
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"No database connection available after {self.timeout}s "
+                            f"({self.max_size} checked out)."
+                        )
+                    if wait_started is None:
+                        wait_started = time.monotonic()
+                        self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+            finally:
+                # Waits that end in a timeout count too, or contention looks lowest when it is worst
+                if wait_started is not None:
+                    self._stats["wait_time"] += time.monotonic() - wait_started
+
+        if conn is not None and not self._is_healthy(conn, last_used):
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+                self._close_connection(conn)
+            conn = None
+
+        if conn is None:
+            try:
+                conn = self._open_connection()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+
+        with self._cond:
+            self._stats["checkouts"] += 1
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """
+        Return a connection to the pool. Connections left mid-transaction are rolled back;
+        broken or discarded connections are closed instead of being reused.
+        """
+        if not discard and not conn.closed:
+            status = conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+
+        with self._cond:
+            if discard or conn.closed or self._closed:
+                self._close_connection(conn)
+                self._open -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for the duration of a with block.
+        The transaction is committed on success and rolled back on error.
+        """
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def stats(self):
+        """
+        Return a snapshot of pool statistics.
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["open_connections"] = self._open
+            stats["idle_connections"] = len(self._idle)
+            stats["in_use_connections"] = self._open - len(self._idle)
+            stats["max_size"] = self.max_size
+        return stats
+
+    def close(self):
+        """
+        Close every idle connection and refuse further checkouts.
+        Connections still checked out are closed when they are returned.
+        """
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._close_connection(conn)
+                self._open -= 1
+            self._cond.notify_all()
@@ -1,11 +1,21 @@
+import io
 import os
+import csv
+import json
 import math
+import hashlib
 import logging
+import datetime
+import threading
+import uuid
 import requests
 import pandas as pd
+from contextlib import contextmanager
 from psycopg2 import sql, connect
-from psycopg2.extras import execute_batch
+from psycopg2.extras import execute_batch, execute_values
 from dotenv import load_dotenv
+from db_pool import ConnectionPool
+from metrics import timed_write
 
 # Load environment variables
 load_dotenv()
@@ -13,6 +23,22 @@ load_dotenv()
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Keys read from yfinance fast_info, in the order of the tickers table update
+FAST_INFO_KEYS = [
+    "dayHigh", "dayLow", "fiftyDayAverage", "lastPrice", "lastVolume", "marketCap",
+    "open", "previousClose", "regularMarketPreviousClose", "yearHigh", "yearLow",
+    "shares", "tenDayAverageVolume", "threeMonthAverageVolume", "twoHundredDayAverage",
+    "yearChange"
+]
+
+# Columns of the 'tickers' table updated from fast_info, in the same order as FAST_INFO_KEYS
+FAST_INFO_COLUMNS = [
+    "day_high", "day_low", "fifty_day_average", "last_price", "last_volume", "market_cap",
+    "open", "previous_close", "regular_market_previous_close", "year_high", "year_low",
+    "shares", "ten_day_average_volume", "three_month_average_volume", "two_hundred_day_average",
+    "yearchange"
+]
+
 def sanitize(value):
     """
     Replace None, NaN, or empty strings with None for database compatibility.
@@ -41,36 +67,90 @@ def get_db_connection():
         logging.error(f"Database connection failed: {e}")
         raise
 
+
+_connection_pool = None
+_connection_pool_lock = threading.Lock()
+
+def get_connection_pool():
+    """
+    Return the process-wide connection pool, creating it on first use.
+    Sized by DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE, with DB_POOL_TIMEOUT seconds to wait
+    for a free connection and DB_POOL_HEALTH_CHECK_INTERVAL seconds of idleness
+    before a connection is probed.
+    """
+    global _connection_pool
+    with _connection_pool_lock:
+        if _connection_pool is None:
+            _connection_pool = ConnectionPool(
+                get_db_connection,
+                min_size=int(os.getenv("DB_POOL_MIN_SIZE", 1)),
+                max_size=int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+                timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+                health_check_interval=float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", 30)),
+            )
+        return _connection_pool
+
+def close_connection_pool():
+    """
+    Close the process-wide connection pool and log its final statistics.
+    """
+    global _connection_pool
+    with _connection_pool_lock:
+        if _connection_pool is None:
+            return
+        logging.info(f"Connection pool statistics: {_connection_pool.stats()}")
+        _connection_pool.close()
+        _connection_pool = None
+
+@contextmanager
+def pooled_connection(connection=None):
+    """
+    Yield a database connection for a unit of work.
+    If a connection is provided it is used as-is and the caller owns the transaction.
+    Otherwise one is checked out of the shared pool, committed on success,
+    rolled back on error and returned to the pool.
+    """
+    if connection is not None:
+        yield connection
+        return
+
+    with get_connection_pool().connection() as conn:
+        yield conn
+
 def execute_query(query, params=None, fetch_one=False, fetch_all=False, connection=None):
     """
     Helper function to execute database queries safely.
-    If no connection is provided, a new one is created.
+    If no connection is provided, one is checked out of the shared pool.
     """
-    should_close_connection = connection is None
-    connection = connection or get_db_connection()
-
     try:
-        with connection.cursor() as cursor:
-            cursor.execute(query, params)
-            if fetch_one:
-                return cursor.fetchone()
-            if fetch_all:
-                return cursor.fetchall()
-            connection.commit()
+        with pooled_connection(connection) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                if fetch_one:
+                    return cursor.fetchone()
+                if fetch_all:
+                    return cursor.fetchall()
     except Exception as e:
-        if should_close_connection:
-            connection.rollback()
         logging.error(f"Query execution failed: {e}")
         raise
-    finally:
-        if should_close_connection:
-            connection.close()
+
+def execute_values_rowcount(cursor, query, rows, page_size=100, **kwargs):
+    """
+    Run execute_values one page at a time and return the total number of rows the
+    statement affected. execute_values itself only leaves the last page's rowcount,
+    and rows skipped by ON CONFLICT or an IS DISTINCT FROM guard are not counted.
+    """
+    affected = 0
+    for start in range(0, len(rows), page_size):
+        execute_values(cursor, query, rows[start:start + page_size], page_size=page_size, **kwargs)
+        affected += max(cursor.rowcount, 0)
+    return affected
 
 
 def fetch_single_id(table, column, value, connection=None):
     """
     Fetch the ID from a table where the column matches the given value.
-    If no connection is provided, a new one is created.
+    If no connection is provided, one is checked out of the shared pool.
     """
     query = sql.SQL("SELECT id FROM {} WHERE {} = %s").format(
         sql.Identifier(table), sql.Identifier(column)
@@ -82,25 +162,74 @@ def fetch_single_id(table, column, value, connection=None):
         logging.error(f"Failed to fetch ID from {table} where {column} = {value}: {e}")
         raise
 
-def fetch_all_tickers(connection=None):
+def fetch_reference_ids(table, column, connection=None):
+    """
+    Fetch every (name, id) pair of a reference table as a DataFrame with columns [column, 'id'].
+    If no connection is provided, one is checked out of the shared pool.
+    """
+    query = sql.SQL("SELECT {}, id FROM {}").format(
+        sql.Identifier(column), sql.Identifier(table)
+    )
+    try:
+        rows = execute_query(query, fetch_all=True, connection=connection) or []
+        return pd.DataFrame(rows, columns=[column, "id"])
+    except Exception as e:
+        logging.error(f"Failed to fetch reference ids from {table}: {e}")
+        raise
+
+def iter_tickers(connection=None, symbols=None, sector_id=None, stale_after=None, chunk_size=1000):
     """
-    Fetch all tickers from the 'tickers' table.
-    If no connection is provided, a new one is created.
+    Stream (id, ticker) pairs from the 'tickers' table through a named server-side cursor,
+    fetching chunk_size rows per round trip so memory stays flat however many tickers exist.
+    :param symbols: Only include these ticker symbols.
+    :param sector_id: Only include tickers of this sector.
+    :param stale_after: Only include tickers with a dataset never ingested, or last
+        ingested more than this many seconds ago (see 'ingestion_state').
+    :param connection: Optional database connection; it is held until the iterator is exhausted.
     """
-    query = sql.SQL("SELECT * FROM tickers")
+    conditions, params = [], []
+    if symbols is not None:
+        conditions.append(sql.SQL("t.ticker = ANY(%s)"))
+        params.append(list(symbols))
+    if sector_id is not None:
+        conditions.append(sql.SQL("t.sector_id = %s"))
+        params.append(sector_id)
+    if stale_after is not None:
+        conditions.append(sql.SQL(
+            """
+            (SELECT count(*) < %s OR min(s.last_fetched_at) < now() - %s * interval '1 second'
+             FROM ingestion_state s WHERE s.ticker_id = t.id)
+            """
+        ))
+        params.extend([len(DATASETS), stale_after])
+
+    query = sql.SQL("SELECT t.id, t.ticker FROM tickers t {where} ORDER BY t.id").format(
+        where=sql.SQL("WHERE ") + sql.SQL(" AND ").join(conditions) if conditions else sql.SQL("")
+    )
     try:
-        tickers = execute_query(query, fetch_all=True, connection=connection)
-        if not tickers:
-            logging.info("No tickers found in the database.")
-        return tickers
+        with pooled_connection(connection) as conn:
+            with conn.cursor(name=f"iter_tickers_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = chunk_size
+                cursor.execute(query, params)
+                yield from cursor
     except Exception as e:
-        logging.error(f"Failed to fetch all tickers: {e}")
+        logging.error(f"Failed to stream tickers: {e}")
         raise
 
+def fetch_all_tickers(connection=None, symbols=None, sector_id=None, stale_after=None, chunk_size=1000):
+    """
+    Fetch the (id, ticker) pairs of all tickers matching the filters of iter_tickers as a list.
+    If no connection is provided, one is checked out of the shared pool.
+    """
+    tickers = list(iter_tickers(connection, symbols, sector_id, stale_after, chunk_size))
+    if not tickers:
+        logging.info("No tickers found in the database.")
+    return tickers
+
 def create_tables(connection=None):
     """
     Create database tables by executing DDL statements from a file.
-    If no connection is provided, a new one is created.
+    If no connection is provided, one is checked out of the shared pool.
     """
     ddl_file_path = "public/ddl.sql"
 
@@ -118,17 +247,19 @@ def create_tables(connection=None):
         logging.error(f"Failed to create tables: {e}")
         raise
 
-def insert_data_from_csv(file_path, table_name, column_name, csv_column, connection=None):
+def insert_data_from_csv(file_path, table_name, column_name, csv_column, connection=None, df=None):
     """
     Insert unique data from a CSV file into the specified table.
-    If no connection is provided, a new one is created.
+    Pass df to reuse an already parsed copy of the file.
+    If no connection is provided, one is checked out of the shared pool.
     """
-    if not os.path.exists(file_path):
+    if df is None and not os.path.exists(file_path):
         logging.error(f"CSV file not found: {file_path}")
         raise FileNotFoundError(f"CSV file not found: {file_path}")
 
     try:
-        df = pd.read_csv(file_path)
+        if df is None:
+            df = pd.read_csv(file_path)
         if csv_column not in df.columns:
             logging.error(f"Column '{csv_column}' not found in the CSV file.")
             raise ValueError(f"Missing column '{csv_column}' in CSV file.")
@@ -140,49 +271,69 @@ def insert_data_from_csv(file_path, table_name, column_name, csv_column, connect
             sql.Identifier(table_name), sql.Identifier(column_name)
         )
 
-        with connection or get_db_connection() as conn:
+        with pooled_connection(connection) as conn:
             with conn.cursor() as cursor:
                 execute_batch(cursor, query, values)
-            conn.commit()
 
         logging.info(f"Inserted {len(values)} records into {table_name} from '{file_path}'.")
     except Exception as e:
         logging.error(f"Failed to insert data from CSV into {table_name}: {e}")
         raise
 
-def insert_tickers_data(file_path="public/Equity.csv", connection=None):
+def insert_tickers_data(file_path="public/Equity.csv", connection=None, df=None):
     """
     Insert tickers and their details into the database from the CSV file.
-    If no connection is provided, a new one is created.
+    Sector and industry ids are joined onto the CSV rows in memory, and the
+    ticker id cache is reloaded afterwards so it includes any new rows.
+    Pass df to reuse an already parsed copy of the file.
+    If no connection is provided, one is checked out of the shared pool.
     """
     required_columns = ["Security Id", "Security Name", "Sector Name", "Industry New Name"]
 
-    if not os.path.exists(file_path):
+    if df is None and not os.path.exists(file_path):
         logging.error(f"CSV file not found: {file_path}")
         raise FileNotFoundError(f"CSV file not found: {file_path}")
 
     try:
         # Load and validate CSV
-        df = pd.read_csv(file_path)
+        if df is None:
+            df = pd.read_csv(file_path)
         missing_columns = [col for col in required_columns if col not in df.columns]
         if missing_columns:
             logging.error(f"Missing columns in CSV file: {', '.join(missing_columns)}")
             raise ValueError(f"Missing columns: {', '.join(missing_columns)}")
 
         ticker_data = df[required_columns].dropna()
-        records = []
-
-        # Process each row
-        with connection or get_db_connection() as conn:
-            for _, row in ticker_data.iterrows():
-                industry_id = fetch_single_id("industries", "industry_name", row["Industry New Name"], conn)
-                sector_id = fetch_single_id("sectors", "sector_name", row["Sector Name"], conn)
 
-                if industry_id is None or sector_id is None:
-                    logging.warning(f"Skipping row due to missing IDs: {row.to_dict()}")
-                    continue
+        with pooled_connection(connection) as conn:
+            # Resolve sector and industry ids with one query per reference table
+            industries = fetch_reference_ids("industries", "industry_name", conn)
+            sectors = fetch_reference_ids("sectors", "sector_name", conn)
+            ticker_data = (
+                ticker_data
+                .merge(industries.rename(columns={"industry_name": "Industry New Name", "id": "industry_id"}),
+                       on="Industry New Name", how="left")
+                .merge(sectors.rename(columns={"sector_name": "Sector Name", "id": "sector_id"}),
+                       on="Sector Name", how="left")
+            )
+
+            unmatched = ticker_data[ticker_data["industry_id"].isna() | ticker_data["sector_id"].isna()]
+            if not unmatched.empty:
+                unknown_names = sorted(
+                    set(unmatched.loc[unmatched["industry_id"].isna(), "Industry New Name"])
+                    | set(unmatched.loc[unmatched["sector_id"].isna(), "Sector Name"])
+                )
+                logging.warning(
+                    f"Skipping {len(unmatched)} rows with unknown sector or industry: {', '.join(unknown_names)}"
+                )
 
-                records.append((row["Security Id"], row["Security Name"], sector_id, industry_id))
+            matched = ticker_data.drop(unmatched.index)
+            records = list(zip(
+                matched["Security Id"],
+                matched["Security Name"],
+                matched["sector_id"].astype(int).tolist(),
+                matched["industry_id"].astype(int).tolist(),
+            ))
 
             # Insert data
             if records:
@@ -194,7 +345,8 @@ def insert_tickers_data(file_path="public/Equity.csv", connection=None):
                 )
                 with conn.cursor() as cursor:
                     execute_batch(cursor, query, records)
-                conn.commit()
+
+            load_ticker_id_cache(conn)
 
         logging.info(f"Inserted {len(records)} tickers successfully from '{file_path}'.")
     except Exception as e:
@@ -208,31 +360,42 @@ def fetch_industry_id(industry_name, connection=None):
     return fetch_single_id("industries", "industry_name", industry_name, connection)
 
         
-def fetch_ticker_id(ticker, connection=None):
+_ticker_id_cache = {}
+_ticker_id_cache_lock = threading.Lock()
+
+def load_ticker_id_cache(connection=None):
     """
-    Fetch the ID of a company by its ticker symbol.
+    Load the symbol to ticker id map from the 'tickers' table in a single query,
+    replacing the current contents of the in-memory cache.
     """
-    return fetch_single_id("tickers", "ticker", ticker, connection)
+    query = sql.SQL("SELECT ticker, id FROM {}").format(sql.Identifier('tickers'))
+    try:
+        rows = execute_query(query, fetch_all=True, connection=connection) or []
+        with _ticker_id_cache_lock:
+            _ticker_id_cache.clear()
+            _ticker_id_cache.update(rows)
+        logging.info(f"Loaded {len(rows)} ticker ids into the cache.")
+        return len(rows)
+    except Exception as e:
+        logging.error(f"Failed to load ticker id cache: {e}")
+        raise
 
-        
-        
-def fetch_all_tickers():
+def fetch_ticker_id(ticker, connection=None):
     """
-    Fetch all tickers from the 'tickers' table.
+    Fetch the ID of a company by its ticker symbol.
+    Served from the in-memory cache, falling back to the database on a miss.
     """
-    query = sql.SQL("SELECT * FROM {}").format(
-        sql.Identifier('tickers')
-    )
-    conn = get_db_connection()
-    with conn.cursor() as cursor:
-        try:
-            cursor.execute(query)
-            tickers = cursor.fetchall()
-            return tickers if tickers else None
-        except Exception as e:
-            raise Exception(f"Failed to fetch tickers: {e}")
-        
-        
+    with _ticker_id_cache_lock:
+        ticker_id = _ticker_id_cache.get(ticker)
+    if ticker_id is not None:
+        return ticker_id
+
+    ticker_id = fetch_single_id("tickers", "ticker", ticker, connection)
+    if ticker_id is not None:
+        with _ticker_id_cache_lock:
+            _ticker_id_cache[ticker] = ticker_id
+    return ticker_id
+
 def fetch_ticker_data(ticker, conn):
     """
     Fetch the ID of a company by its ticker symbol.
@@ -256,7 +419,7 @@ def fetch_sector_id(sector_name, connection=None):
     return fetch_single_id("sectors", "sector_name", sector_name, connection)
 
 
-def insert_industry_data(file_path="public/Equity.csv", connection=None):
+def insert_industry_data(file_path="public/Equity.csv", connection=None, df=None):
     """
     Insert unique industry names from the CSV file into the 'industries' table.
     """
@@ -266,7 +429,8 @@ def insert_industry_data(file_path="public/Equity.csv", connection=None):
             table_name="industries",
             column_name="industry_name",
             csv_column="Industry New Name",
-            connection=connection
+            connection=connection,
+            df=df
         )
         logging.info("Industry data inserted successfully.")
     except Exception as e:
@@ -274,7 +438,7 @@ def insert_industry_data(file_path="public/Equity.csv", connection=None):
         raise
 
         
-def insert_sector_data(file_path="public/Equity.csv", connection=None):
+def insert_sector_data(file_path="public/Equity.csv", connection=None, df=None):
     """
     Insert unique sector names from the CSV file into the 'sectors' table.
     """
@@ -284,7 +448,8 @@ def insert_sector_data(file_path="public/Equity.csv", connection=None):
             table_name="sectors",
             column_name="sector_name",
             csv_column="Sector Name",
-            connection=connection
+            connection=connection,
+            df=df
         )
         logging.info("Sector data inserted successfully.")
     except Exception as e:
@@ -292,245 +457,516 @@ def insert_sector_data(file_path="public/Equity.csv", connection=None):
         raise
 
 
-def insert_tickers_data():
+def file_fingerprint(file_path):
+    """
+    Return the size, modification time and SHA-256 digest of a file.
     """
-    Insert tickers data (ticker, security_name, industry_id) from the CSV file into the 'tickers' table.
+    stat = os.stat(file_path)
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as source:
+        for block in iter(lambda: source.read(1024 * 1024), b""):
+            digest.update(block)
+    return {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest.hexdigest()}
+
+def fingerprint_unchanged(file_path, stored):
     """
-    conn = get_db_connection()
-    file_path = "public/Equity.csv"
-    insert_query = sql.SQL(
-        "INSERT INTO {} (ticker, security_name, sector_id, industry_id) VALUES (%s, %s, %s, %s) ON CONFLICT DO NOTHING"
-    ).format(sql.Identifier('tickers'))
+    Return True if a file still matches its stored fingerprint. The file is only hashed
+    when its size or modification time differ, e.g. after a fresh checkout.
+    """
+    if not stored:
+        return False
+    stat = os.stat(file_path)
+    if stat.st_size == stored.get("size") and stat.st_mtime == stored.get("mtime"):
+        return True
+    return file_fingerprint(file_path)["sha256"] == stored.get("sha256")
+
+def fetch_schema_version(component, connection=None):
+    """
+    Return the stored fingerprint of a setup component, or None if it was never applied
+    (or the 'schema_version' table does not exist yet).
+    """
+    with pooled_connection(connection) as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('public.schema_version')")
+        if cursor.fetchone()[0] is None:
+            return None
+        cursor.execute("SELECT fingerprint FROM schema_version WHERE component = %s", (component,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+def record_schema_version(component, fingerprint, connection=None):
+    """
+    Store the fingerprint of a setup component that was just applied.
+    """
+    query = sql.SQL(
+        """
+        INSERT INTO schema_version (component, fingerprint, applied_at) VALUES (%s, %s::jsonb, now())
+        ON CONFLICT (component) DO UPDATE SET fingerprint = EXCLUDED.fingerprint, applied_at = EXCLUDED.applied_at
+        """
+    )
+    execute_query(query, (component, json.dumps(fingerprint)), connection=connection)
 
-    try:
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"{file_path} not found.")
+def ensure_schema(connection=None):
+    """
+    Apply the DDL file unless the version recorded in 'schema_version' matches its contents.
+    Returns True if the DDL was applied.
+    """
+    ddl_file_path = "public/ddl.sql"
+    with pooled_connection(connection) as conn:
+        if fingerprint_unchanged(ddl_file_path, fetch_schema_version("ddl", conn)):
+            logging.info("Schema is up to date; skipping DDL.")
+            return False
+        create_tables(conn)
+        record_schema_version("ddl", file_fingerprint(ddl_file_path), conn)
+    return True
+
+def ensure_reference_data(file_path="public/Equity.csv", connection=None):
+    """
+    Seed industries, sectors and tickers from the CSV file unless its fingerprint matches
+    the one recorded after the last seeding. The CSV is parsed once for all three tables,
+    and the seed and its fingerprint are committed together. The ticker id cache is
+    loaded either way. Returns True if the reference data was seeded.
+    """
+    with pooled_connection(connection) as conn:
+        if fingerprint_unchanged(file_path, fetch_schema_version("equity_csv", conn)):
+            logging.info(f"'{file_path}' is unchanged; skipping reference data seeding.")
+            load_ticker_id_cache(conn)
+            return False
 
+        if not os.path.exists(file_path):
+            logging.error(f"CSV file not found: {file_path}")
+            raise FileNotFoundError(f"CSV file not found: {file_path}")
+        fingerprint = file_fingerprint(file_path)
         df = pd.read_csv(file_path)
+        insert_industry_data(file_path, conn, df=df)
+        insert_sector_data(file_path, conn, df=df)
+        insert_tickers_data(file_path, conn, df=df)
+        record_schema_version("equity_csv", fingerprint, conn)
+    return True
 
-        required_columns = ['Security Id', 'Security Name', 'Sector Name', 'Industry New Name']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            raise ValueError(f"Missing columns in CSV file: {', '.join(missing_columns)}")
 
-        ticker_data = df[['Security Id', 'Security Name', 'Sector Name', 'Industry New Name']].dropna()
+def dividend_rows(dividend_data, ticker_id):
+    """
+    Map a yfinance dividends dictionary to 'dividends' row tuples.
+    """
+    return [(ticker_id, date, amount) for date, amount in dividend_data.items()]
 
-        security_values = []
-        for _, row in ticker_data.iterrows():
-            industry_id = fetch_industry_id(row['Industry New Name'], conn)
-            sector_id = fetch_sector_id(row['Sector Name'], conn)
-            if industry_id is None:
-                logging.info(f"Industry '{row['Industry New Name']}' not found. Skipping row.")
-                continue
-            security_values.append((row['Security Id'], row['Security Name'], sector_id, industry_id))
 
-        if security_values:
-            with conn.cursor() as cursor:
-                execute_batch(cursor, insert_query, security_values)
-            conn.commit()
-            logging.info(f"{len(security_values)} securities inserted successfully.")
-        else:
-            logging.info("No securities data to insert.")
+@timed_write("dividends")
+def bulk_insert_dividends(rows, connection=None):
+    """
+    Insert dividend rows built by dividend_rows, for one or many tickers.
+    """
+    query = sql.SQL(
+        """
+        INSERT INTO dividends (ticker_id, action_date, price)
+        VALUES %s
+        ON CONFLICT DO NOTHING
+        """
+    )
 
-    except Exception as e:
-        conn.rollback()
-        raise Exception(f"Failed to insert security data: {e}")
-    
-    finally:
-        conn.close()
-        
-        
-def insert_dividend_data(dividend_data, symbol, connection=None):
+    with pooled_connection(connection) as conn, conn.cursor() as cursor:
+        return execute_values_rowcount(cursor, query.as_string(conn), rows, page_size=1000)
+
+
+def insert_dividend_data(dividend_data, symbol, connection=None, ticker_id=None):
     """
     Insert dividend data into the 'dividends' table based on a dictionary input.
     :param dividend_data: dict containing dividend-related data with dates as keys and amounts as values.
     :param symbol: The stock ticker symbol.
     :param connection: Optional database connection for reuse.
+    :param ticker_id: Optional ticker id, looked up from symbol when not given.
     """
     if not isinstance(dividend_data, dict):
         raise ValueError("dividend_data must be a dictionary.")
     if not isinstance(symbol, str) or not symbol.strip():
         raise ValueError("symbol must be a non-empty string.")
 
-    query = sql.SQL(
-        """
-        INSERT INTO dividends (ticker_id, action_date, price)
-        VALUES (%s, %s, %s)
-        ON CONFLICT DO NOTHING
-        """
-    )
-
     try:
-        with connection or get_db_connection() as conn:
-            ticker_id = fetch_ticker_id(symbol, conn)
+        with pooled_connection(connection) as conn:
+            if ticker_id is None:
+                ticker_id = fetch_ticker_id(symbol, conn)
             if ticker_id is None:
                 raise ValueError(f"Ticker '{symbol}' not found.")
 
-            values = [(ticker_id, date, amount) for date, amount in dividend_data.items()]
+            values = dividend_rows(dividend_data, ticker_id)
             if not values:
                 logging.info(f"No dividend data to insert for ticker: {symbol}.")
                 return
 
-            with conn.cursor() as cursor:
-                execute_batch(cursor, query, values)
-            conn.commit()
+            bulk_insert_dividends(values, conn)
 
         logging.info(f"Inserted {len(values)} dividend records for ticker '{symbol}'.")
     except Exception as e:
         logging.error(f"Failed to insert dividend data for '{symbol}': {e}")
         raise
 
-def insert_balance_sheet(balance_sheet, symbol):
+# Database column names of the 'balance_sheets' table
+BALANCE_SHEET_COLUMNS = [
+    "treasury_shares_number",
+    "ordinary_shares_number",
+    "share_issued",
+    "total_debt",
+    "tangible_book_value",
+    "invested_capital",
+    "working_capital",
+    "net_tangible_assets",
+    "capital_lease_obligations",
+    "common_stock_equity",
+    "total_capitalization",
+    "total_equity_gross_minority_interest",
+    "stockholders_equity",
+    "other_equity_interest",
+    "retained_earnings",
+    "additional_paid_in_capital",
+    "capital_stock",
+    "common_stock",
+    "total_liabilities_net_minority_interest",
+    "total_non_current_liabilities_net_minority_interest",
+    "derivative_product_liabilities",
+    "long_term_debt_and_capital_lease_obligation",
+    "long_term_capital_lease_obligation",
+    "long_term_debt",
+    "long_term_provisions",
+    "current_liabilities",
+    "other_current_liabilities",
+    "current_deferred_taxes_liabilities",
+    "current_debt_and_capital_lease_obligation",
+    "current_capital_lease_obligation",
+    "pension_and_other_post_retirement_benefit_plans_current",
+    "current_provisions",
+    "payables",
+    "other_payable",
+    "dividends_payable",
+    "total_tax_payable",
+    "accounts_payable",
+    "total_assets",
+    "total_non_current_assets",
+    "other_non_current_assets",
+    "non_current_prepaid_assets",
+    "non_current_deferred_taxes_assets",
+    "financial_assets",
+    "other_investments",
+    "investment_in_financial_assets",
+    "available_for_sale_securities",
+    "goodwill_and_other_intangible_assets",
+    "other_intangible_assets",
+    "goodwill",
+    "net_ppe",
+    "accumulated_depreciation",
+    "gross_ppe",
+    "construction_in_progress",
+    "other_properties",
+    "machinery_furniture_equipment",
+    "buildings_and_improvements",
+    "land_and_improvements",
+    "properties",
+    "current_assets",
+    "other_current_assets",
+    "hedging_assets_current",
+    "assets_held_for_sale_current",
+    "restricted_cash",
+    "prepaid_assets",
+    "inventory",
+    "finished_goods",
+    "work_in_process",
+    "raw_materials",
+    "other_receivables",
+    "taxes_receivable",
+    "accounts_receivable",
+    "allowance_for_doubtful_accounts_receivable",
+    "gross_accounts_receivable",
+    "cash_cash_equivalents_and_short_term_investments",
+    "other_short_term_investments",
+    "cash_and_cash_equivalents",
+    "cash_equivalents",
+    "cash_financial"
+]
+
+# Keys in the yfinance balance sheet, in the same order as BALANCE_SHEET_COLUMNS
+BALANCE_SHEET_KEYS = [
+    "TreasurySharesNumber", "OrdinarySharesNumber", "ShareIssued", "TotalDebt", 
+    "TangibleBookValue", "InvestedCapital", "WorkingCapital", "NetTangibleAssets",
+    "CapitalLeaseObligations", "CommonStockEquity", "TotalCapitalization", 
+    "TotalEquityGrossMinorityInterest", "StockholdersEquity", "OtherEquityInterest", 
+    "RetainedEarnings", "AdditionalPaidInCapital", "CapitalStock", "CommonStock",
+    "TotalLiabilitiesNetMinorityInterest", "TotalNonCurrentLiabilitiesNetMinorityInterest",
+    "DerivativeProductLiabilities", "LongTermDebtAndCapitalLeaseObligation", 
+    "LongTermCapitalLeaseObligation", "LongTermDebt", "LongTermProvisions", 
+    "CurrentLiabilities", "OtherCurrentLiabilities", "CurrentDeferredTaxesLiabilities",
+    "CurrentDebtAndCapitalLeaseObligation", "CurrentCapitalLeaseObligation", 
+    "PensionAndOtherPostRetirementBenefitPlansCurrent", "CurrentProvisions", 
+    "Payables", "OtherPayable", "DividendsPayable", "TotalTaxPayable", "AccountsPayable",
+    "TotalAssets", "TotalNonCurrentAssets", "OtherNonCurrentAssets", 
+    "NonCurrentPrepaidAssets", "NonCurrentDeferredTaxesAssets", "FinancialAssets",
+    "OtherInvestments", "InvestmentInFinancialAssets", "AvailableForSaleSecurities",
+    "GoodwillAndOtherIntangibleAssets", "OtherIntangibleAssets", "Goodwill", "NetPpe",
+    "AccumulatedDepreciation", "GrossPpe", "ConstructionInProgress", "OtherProperties", 
+    "MachineryFurnitureEquipment", "BuildingsAndImprovements", "LandAndImprovements",
+    "Properties", "CurrentAssets", "OtherCurrentAssets", "HedgingAssetsCurrent", 
+    "AssetsHeldForSaleCurrent", "RestrictedCash", "PrepaidAssets", "Inventory",
+    "FinishedGoods", "WorkInProcess", "RawMaterials", "OtherReceivables", "TaxesReceivable",
+    "AccountsReceivable", "AllowanceForDoubtfulAccountsReceivable", "GrossAccountsReceivable",
+    "CashCashEquivalentsAndShortTermInvestments", "OtherShortTermInvestments", 
+    "CashAndCashEquivalents", "CashEquivalents", "CashFinancial"
+]
+
+
+def copy_rows(table, columns, rows, connection=None):
+    """
+    Bulk-load rows into a table with COPY ... FROM STDIN.
+    Rows are streamed as CSV into a session-local staging table and then merged into
+    the target with INSERT ... SELECT ... ON CONFLICT DO NOTHING, so the conflict
+    handling matches the row-by-row inserts. Rows may belong to any number of tickers.
+    :param table: Target table name.
+    :param columns: Target column names, in the order of the values in each row.
+    :param rows: Iterable of value tuples.
+    :param connection: Optional database connection for reuse.
+    :return: Number of rows inserted into the target table.
+    """
+    staging_table = f"{table}_staging"
+    column_list = sql.SQL(', ').join(map(sql.Identifier, columns))
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+
+    try:
+        with pooled_connection(connection) as conn, conn.cursor() as cursor:
+            cursor.execute(
+                sql.SQL("CREATE TEMP TABLE IF NOT EXISTS {} AS SELECT {} FROM {} WITH NO DATA").format(
+                    sql.Identifier(staging_table), column_list, sql.Identifier(table)
+                )
+            )
+            cursor.execute(sql.SQL("TRUNCATE {}").format(sql.Identifier(staging_table)))
+            cursor.copy_expert(
+                sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+                    sql.Identifier(staging_table), column_list
+                ).as_string(conn),
+                buffer
+            )
+            cursor.execute(
+                sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {} ON CONFLICT DO NOTHING").format(
+                    sql.Identifier(table), column_list, column_list, sql.Identifier(staging_table)
+                )
+            )
+            inserted = cursor.rowcount
+            cursor.execute(sql.SQL("TRUNCATE {}").format(sql.Identifier(staging_table)))
+        return inserted
+    except Exception as e:
+        logging.error(f"Failed to bulk load rows into {table}: {e}")
+        raise
+
+
+# Database column names of the 'prices' table
+PRICE_COLUMNS = ["ticker_id", "date", "open", "high", "low", "close", "adj_close", "volume"]
+
+
+def price_rows(history, ticker_id):
+    """
+    Map a yfinance daily history DataFrame to 'prices' row tuples, skipping days without a close.
+    """
+    history = history.dropna(subset=["Close"])
+    if "Adj Close" not in history:
+        history = history.assign(**{"Adj Close": history["Close"]})
+    values = history[["Open", "High", "Low", "Close", "Adj Close", "Volume"]].astype(float)
+    # Zero is a valid price or volume, so only NaN is treated as missing
+    values = values.astype(object).where(values.notna(), None)
+    return [
+        (ticker_id, date.date(), open_, high, low, close, adj_close, int(volume) if volume is not None else None)
+        for date, (open_, high, low, close, adj_close, volume)
+        in zip(history.index, values.itertuples(index=False, name=None))
+    ]
+
+
+# Years whose 'prices' partition is known to exist
+_price_partitions = set()
+_price_partitions_lock = threading.Lock()
+
+
+def price_partition_name(year):
+    return f"prices_{year}"
+
+def ensure_price_partitions(years, connection=None):
+    """
+    Create the yearly partitions of the 'prices' table that the given years need.
+    A year whose partition was detached (see detach_price_partitions) still has its
+    standalone prices_YYYY table, which would make CREATE TABLE IF NOT EXISTS a no-op,
+    so attachment is checked in pg_inherits and such years raise a ValueError.
+    """
+    with _price_partitions_lock:
+        missing = set(years) - _price_partitions
+    if not missing:
+        return
+
+    with pooled_connection(connection) as conn:
+        attached = set(list_price_partitions(conn))
+        with _price_partitions_lock:
+            _price_partitions.update(attached)
+        missing = sorted(missing - attached)
+        if not missing:
+            return
+
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname FROM pg_class WHERE relnamespace = 'public'::regnamespace AND relname = ANY(%s)",
+                ([price_partition_name(year) for year in missing],)
+            )
+            detached = sorted(name for (name,) in cursor.fetchall())
+            if detached:
+                raise ValueError(
+                    f"Price partitions {', '.join(detached)} exist but are detached from 'prices'; "
+                    "re-attach them or drop them before loading rows for those years."
+                )
+            for year in missing:
+                cursor.execute(
+                    sql.SQL("CREATE TABLE IF NOT EXISTS {} PARTITION OF {} FOR VALUES FROM (%s) TO (%s)").format(
+                        sql.Identifier(price_partition_name(year)), sql.Identifier("prices")
+                    ),
+                    (datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1))
+                )
+    with _price_partitions_lock:
+        _price_partitions.update(missing)
+    logging.info(f"Ensured price partitions for {', '.join(map(str, missing))}.")
+
+def list_price_partitions(connection=None):
+    """
+    Return {year: partition name} for the partitions currently attached to 'prices'.
+    """
+    query = sql.SQL(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = 'public.prices'::regclass
+        """
+    )
+    rows = execute_query(query, fetch_all=True, connection=connection) or []
+    return {
+        int(name.rsplit("_", 1)[1]): name for (name,) in rows
+        if name.rsplit("_", 1)[-1].isdigit()
+    }
+
+def detach_price_partitions(before_year, connection=None):
+    """
+    Detach the 'prices' partitions of years before before_year. Detached partitions
+    are kept as standalone tables, so they can be archived, dropped or re-attached.
+    Returns the names of the detached partitions.
+    """
+    detached = []
+    with pooled_connection(connection) as conn:
+        for year, name in sorted(list_price_partitions(conn).items()):
+            if year >= before_year:
+                continue
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+                        sql.Identifier("prices"), sql.Identifier(name)
+                    )
+                )
+            detached.append(name)
+    with _price_partitions_lock:
+        _price_partitions.difference_update(year for year in list(_price_partitions) if year < before_year)
+    if detached:
+        logging.info(f"Detached price partitions: {', '.join(detached)}.")
+    return detached
+
+@timed_write("prices")
+def bulk_insert_prices(rows, connection=None):
+    """
+    Bulk-load daily price rows for any number of tickers through COPY,
+    creating the yearly partitions they fall into first. Rows are sorted by
+    (date, ticker_id) so each heap block holds a narrow date range for the BRIN index.
+    """
+    rows = sorted(rows, key=lambda row: (row[1], row[0]))
+    years = {row[1].year for row in rows}
+    try:
+        with pooled_connection(connection) as conn:
+            ensure_price_partitions(years, conn)
+            return copy_rows("prices", PRICE_COLUMNS, rows, conn)
+    except Exception:
+        # Partitions created in a rolled back transaction are gone again
+        with _price_partitions_lock:
+            _price_partitions.difference_update(years)
+        raise
+
+def fetch_price_history(ticker_ids, start, end, connection=None):
+    """
+    Fetch daily prices of the given tickers between start and end (inclusive) as a
+    DataFrame. The date bounds are sent as literals, so the planner only scans the
+    partitions that overlap the range.
+    """
+    query = sql.SQL(
+        """
+        SELECT {columns} FROM prices
+        WHERE ticker_id = ANY(%s) AND date >= %s AND date <= %s
+        ORDER BY ticker_id, date
+        """
+    ).format(columns=sql.SQL(', ').join(map(sql.Identifier, PRICE_COLUMNS)))
+    rows = execute_query(query, (list(ticker_ids), start, end), fetch_all=True, connection=connection) or []
+    return pd.DataFrame(rows, columns=PRICE_COLUMNS)
+
+
+def fetch_latest_price_dates(connection=None):
+    """
+    Return {ticker_id: date of the latest stored price}.
+    """
+    query = sql.SQL("SELECT ticker_id, max(date) FROM prices GROUP BY ticker_id")
+    try:
+        return dict(execute_query(query, fetch_all=True, connection=connection) or [])
+    except Exception as e:
+        logging.error(f"Failed to fetch latest price dates: {e}")
+        raise
+
+
+def balance_sheet_rows(balance_sheet, ticker_id):
+    """
+    Map a yfinance balance sheet dictionary to 'balance_sheets' row tuples.
+    """
+    return [
+        (ticker_id, report_date) + tuple(
+            sanitize(row_data.get(key)) for key in BALANCE_SHEET_KEYS
+        )
+        for report_date, row_data in balance_sheet.items()
+    ]
+
+
+@timed_write("balance_sheets")
+def bulk_insert_balance_sheets(rows, connection=None):
+    """
+    Bulk-load balance sheet rows built by balance_sheet_rows, for one or many tickers.
+    """
+    return copy_rows("balance_sheets", ["ticker_id", "report_date"] + BALANCE_SHEET_COLUMNS, rows, connection)
+
+
+def insert_balance_sheet(balance_sheet, symbol, connection=None, ticker_id=None):
     """
     Inserts balance_sheet data into the 'balance_sheets' table based on dictionary input.
     :param balance_sheet: dict containing balance sheet data with dates as keys and column-value dictionaries as values.
     :param symbol: The stock ticker symbol.
+    :param connection: Optional database connection for reuse.
+    :param ticker_id: Optional ticker id, looked up from symbol when not given.
     """
     if not isinstance(balance_sheet, dict):
         raise ValueError("balance_sheet must be a dictionary.")
     if not isinstance(symbol, str) or not symbol.strip():
         raise ValueError("symbol must be a non-empty string.")
-    
-    c = [
-        "treasury_shares_number",
-        "ordinary_shares_number",
-        "share_issued",
-        "total_debt",
-        "tangible_book_value",
-        "invested_capital",
-        "working_capital",
-        "net_tangible_assets",
-        "capital_lease_obligations",
-        "common_stock_equity",
-        "total_capitalization",
-        "total_equity_gross_minority_interest",
-        "stockholders_equity",
-        "other_equity_interest",
-        "retained_earnings",
-        "additional_paid_in_capital",
-        "capital_stock",
-        "common_stock",
-        "total_liabilities_net_minority_interest",
-        "total_non_current_liabilities_net_minority_interest",
-        "derivative_product_liabilities",
-        "long_term_debt_and_capital_lease_obligation",
-        "long_term_capital_lease_obligation",
-        "long_term_debt",
-        "long_term_provisions",
-        "current_liabilities",
-        "other_current_liabilities",
-        "current_deferred_taxes_liabilities",
-        "current_debt_and_capital_lease_obligation",
-        "current_capital_lease_obligation",
-        "pension_and_other_post_retirement_benefit_plans_current",
-        "current_provisions",
-        "payables",
-        "other_payable",
-        "dividends_payable",
-        "total_tax_payable",
-        "accounts_payable",
-        "total_assets",
-        "total_non_current_assets",
-        "other_non_current_assets",
-        "non_current_prepaid_assets",
-        "non_current_deferred_taxes_assets",
-        "financial_assets",
-        "other_investments",
-        "investment_in_financial_assets",
-        "available_for_sale_securities",
-        "goodwill_and_other_intangible_assets",
-        "other_intangible_assets",
-        "goodwill",
-        "net_ppe",
-        "accumulated_depreciation",
-        "gross_ppe",
-        "construction_in_progress",
-        "other_properties",
-        "machinery_furniture_equipment",
-        "buildings_and_improvements",
-        "land_and_improvements",
-        "properties",
-        "current_assets",
-        "other_current_assets",
-        "hedging_assets_current",
-        "assets_held_for_sale_current",
-        "restricted_cash",
-        "prepaid_assets",
-        "inventory",
-        "finished_goods",
-        "work_in_process",
-        "raw_materials",
-        "other_receivables",
-        "taxes_receivable",
-        "accounts_receivable",
-        "allowance_for_doubtful_accounts_receivable",
-        "gross_accounts_receivable",
-        "cash_cash_equivalents_and_short_term_investments",
-        "other_short_term_investments",
-        "cash_and_cash_equivalents",
-        "cash_equivalents",
-        "cash_financial"
-    ]
-
-    columns = [
-        "TreasurySharesNumber", "OrdinarySharesNumber", "ShareIssued", "TotalDebt", 
-        "TangibleBookValue", "InvestedCapital", "WorkingCapital", "NetTangibleAssets",
-        "CapitalLeaseObligations", "CommonStockEquity", "TotalCapitalization", 
-        "TotalEquityGrossMinorityInterest", "StockholdersEquity", "OtherEquityInterest", 
-        "RetainedEarnings", "AdditionalPaidInCapital", "CapitalStock", "CommonStock",
-        "TotalLiabilitiesNetMinorityInterest", "TotalNonCurrentLiabilitiesNetMinorityInterest",
-        "DerivativeProductLiabilities", "LongTermDebtAndCapitalLeaseObligation", 
-        "LongTermCapitalLeaseObligation", "LongTermDebt", "LongTermProvisions", 
-        "CurrentLiabilities", "OtherCurrentLiabilities", "CurrentDeferredTaxesLiabilities",
-        "CurrentDebtAndCapitalLeaseObligation", "CurrentCapitalLeaseObligation", 
-        "PensionAndOtherPostRetirementBenefitPlansCurrent", "CurrentProvisions", 
-        "Payables", "OtherPayable", "DividendsPayable", "TotalTaxPayable", "AccountsPayable",
-        "TotalAssets", "TotalNonCurrentAssets", "OtherNonCurrentAssets", 
-        "NonCurrentPrepaidAssets", "NonCurrentDeferredTaxesAssets", "FinancialAssets",
-        "OtherInvestments", "InvestmentInFinancialAssets", "AvailableForSaleSecurities",
-        "GoodwillAndOtherIntangibleAssets", "OtherIntangibleAssets", "Goodwill", "NetPpe",
-        "AccumulatedDepreciation", "GrossPpe", "ConstructionInProgress", "OtherProperties", 
-        "MachineryFurnitureEquipment", "BuildingsAndImprovements", "LandAndImprovements",
-        "Properties", "CurrentAssets", "OtherCurrentAssets", "HedgingAssetsCurrent", 
-        "AssetsHeldForSaleCurrent", "RestrictedCash", "PrepaidAssets", "Inventory",
-        "FinishedGoods", "WorkInProcess", "RawMaterials", "OtherReceivables", "TaxesReceivable",
-        "AccountsReceivable", "AllowanceForDoubtfulAccountsReceivable", "GrossAccountsReceivable",
-        "CashCashEquivalentsAndShortTermInvestments", "OtherShortTermInvestments", 
-        "CashAndCashEquivalents", "CashEquivalents", "CashFinancial"
-    ]
-    
-    insert_query = sql.SQL("""
-        INSERT INTO balance_sheets (
-            ticker_id, report_date, {columns}
-        ) VALUES (%s, %s, {placeholders})
-        ON CONFLICT DO NOTHING
-        """).format(
-            columns=sql.SQL(', ').join(map(sql.Identifier, c)),
-            placeholders=sql.SQL(', ').join(sql.Placeholder() for _ in columns)
-        )
 
     try:
-        with get_db_connection() as conn:
-            ticker_id = fetch_ticker_id(symbol, conn)
+        with pooled_connection(connection) as conn:
+            if ticker_id is None:
+                ticker_id = fetch_ticker_id(symbol, conn)
             if ticker_id is None:
                 raise ValueError(f"Ticker '{symbol}' not found.")
 
             logging.info(f"Inserting balance sheet data for ticker ID: {ticker_id}")
 
-            values = [
-                (ticker_id, report_date) + tuple(
-                    sanitize(row_data.get(column)) for column in columns
-                )
-                for report_date, row_data in balance_sheet.items()
-            ]
+            values = balance_sheet_rows(balance_sheet, ticker_id)
 
             if not values:
                 logging.warning("No balance sheet data to insert.")
                 return
 
-            with conn.cursor() as cursor:
-                execute_batch(cursor, insert_query, values)
-            conn.commit()
+            bulk_insert_balance_sheets(values, conn)
 
             logging.info(f"Successfully inserted balance sheet data for symbol: {symbol}")
     except Exception as e:
@@ -538,145 +974,136 @@ def insert_balance_sheet(balance_sheet, symbol):
         raise
     
     
-def insert_cashflow(cashflow, symbol):
-
-    if not isinstance(cashflow, dict):
-        raise ValueError("cashflow must be a dictionary.")
-    if not isinstance(symbol, str) or not symbol.strip():
-        raise ValueError("symbol must be a non-empty string.")
-    
-    # Database column names
-    cashflow_keys = [
-        'FreeCashFlow',
-        'CapitalExpenditure',
-        'EndCashPosition',
-        'BeginningCashPosition',
-        'EffectOfExchangeRateChanges',
-        'ChangesInCash',
-        'FinancingCashFlow',
-        'InterestPaidCFF',
-        'CashDividendsPaid',
-        'CommonStockDividendPaid',
-        'InvestingCashFlow',
-        'NetOtherInvestingChanges',
-        'InterestReceivedCFI',
-        'NetInvestmentPurchaseAndSale',
-        'SaleOfInvestment',
-        'PurchaseOfInvestment',
-        'NetBusinessPurchaseAndSale',
-        'SaleOfBusiness',
-        'PurchaseOfBusiness',
-        'NetPPEPurchaseAndSale',
-        'SaleOfPPE',
-        'PurchaseOfPPE',
-        'OperatingCashFlow',
-        'TaxesRefundPaid',
-        'ChangeInWorkingCapital',
-        'ChangeInOtherCurrentLiabilities',
-        'ChangeInOtherCurrentAssets',
-        'ChangeInPayable',
-        'ChangeInInventory',
-        'ChangeInReceivables',
-        'OtherNonCashItems',
-        'ProvisionandWriteOffofAssets',
-        'DepreciationAndAmortization',
-        'AmortizationCashFlow',
-        'Depreciation',
-        'GainLossOnInvestmentSecurities',
-        'NetForeignCurrencyExchangeGainLoss',
-        'GainLossOnSaleOfPPE',
-        'GainLossOnSaleOfBusiness',
-        'NetIncomeFromContinuingOperations'
+# Keys in the yfinance cashflow statement
+CASHFLOW_KEYS = [
+    'FreeCashFlow',
+    'CapitalExpenditure',
+    'EndCashPosition',
+    'BeginningCashPosition',
+    'EffectOfExchangeRateChanges',
+    'ChangesInCash',
+    'FinancingCashFlow',
+    'InterestPaidCFF',
+    'CashDividendsPaid',
+    'CommonStockDividendPaid',
+    'InvestingCashFlow',
+    'NetOtherInvestingChanges',
+    'InterestReceivedCFI',
+    'NetInvestmentPurchaseAndSale',
+    'SaleOfInvestment',
+    'PurchaseOfInvestment',
+    'NetBusinessPurchaseAndSale',
+    'SaleOfBusiness',
+    'PurchaseOfBusiness',
+    'NetPPEPurchaseAndSale',
+    'SaleOfPPE',
+    'PurchaseOfPPE',
+    'OperatingCashFlow',
+    'TaxesRefundPaid',
+    'ChangeInWorkingCapital',
+    'ChangeInOtherCurrentLiabilities',
+    'ChangeInOtherCurrentAssets',
+    'ChangeInPayable',
+    'ChangeInInventory',
+    'ChangeInReceivables',
+    'OtherNonCashItems',
+    'ProvisionandWriteOffofAssets',
+    'DepreciationAndAmortization',
+    'AmortizationCashFlow',
+    'Depreciation',
+    'GainLossOnInvestmentSecurities',
+    'NetForeignCurrencyExchangeGainLoss',
+    'GainLossOnSaleOfPPE',
+    'GainLossOnSaleOfBusiness',
+    'NetIncomeFromContinuingOperations'
+]
+
+# Database column names of the 'cashflows' table, in the same order as CASHFLOW_KEYS
+CASHFLOW_COLUMNS = [
+    'free_cash_flow',
+    'capital_expenditure',
+    'end_cash_position',
+    'beginning_cash_position',
+    'effect_of_exchange_rate_changes',
+    'changes_in_cash',
+    'financing_cash_flow',
+    'interest_paid_cff',
+    'cash_dividends_paid',
+    'common_stock_dividend_paid',
+    'investing_cash_flow',
+    'net_other_investing_changes',
+    'interest_received_cfi',
+    'net_investment_purchase_and_sale',
+    'sale_of_investment',
+    'purchase_of_investment',
+    'net_business_purchase_and_sale',
+    'sale_of_business',
+    'purchase_of_business',
+    'net_ppe_purchase_and_sale',
+    'sale_of_ppe',
+    'purchase_of_ppe',
+    'operating_cash_flow',
+    'taxes_refund_paid',
+    'change_in_working_capital',
+    'change_in_other_current_liabilities',
+    'change_in_other_current_assets',
+    'change_in_payable',
+    'change_in_inventory',
+    'change_in_receivables',
+    'other_non_cash_items',
+    'provisionand_write_offof_assets',
+    'depreciation_and_amortization',
+    'amortization_cash_flow',
+    'depreciation',
+    'gain_loss_on_investment_securities',
+    'net_foreign_currency_exchange_gain_loss',
+    'gain_loss_on_sale_of_ppe',
+    'gain_loss_on_sale_of_business',
+    'net_income_from_continuing_operations'
+]
+
+
+def cashflow_rows(cashflow, ticker_id):
+    """
+    Map a yfinance cashflow dictionary to 'cashflows' row tuples.
+    """
+    return [
+        (ticker_id, report_date) + tuple(row_data.get(key) for key in CASHFLOW_KEYS)
+        for report_date, row_data in cashflow.items()
     ]
 
-    # Keys in the cashflow dictionary
-    db_columns = [
-        'free_cash_flow',
-        'capital_expenditure',
-        'end_cash_position',
-        'beginning_cash_position',
-        'effect_of_exchange_rate_changes',
-        'changes_in_cash',
-        'financing_cash_flow',
-        'interest_paid_cff',
-        'cash_dividends_paid',
-        'common_stock_dividend_paid',
-        'investing_cash_flow',
-        'net_other_investing_changes',
-        'interest_received_cfi',
-        'net_investment_purchase_and_sale',
-        'sale_of_investment',
-        'purchase_of_investment',
-        'net_business_purchase_and_sale',
-        'sale_of_business',
-        'purchase_of_business',
-        'net_ppe_purchase_and_sale',
-        'sale_of_ppe',
-        'purchase_of_ppe',
-        'operating_cash_flow',
-        'taxes_refund_paid',
-        'change_in_working_capital',
-        'change_in_other_current_liabilities',
-        'change_in_other_current_assets',
-        'change_in_payable',
-        'change_in_inventory',
-        'change_in_receivables',
-        'other_non_cash_items',
-        'provisionand_write_offof_assets',
-        'depreciation_and_amortization',
-        'amortization_cash_flow',
-        'depreciation',
-        'gain_loss_on_investment_securities',
-        'net_foreign_currency_exchange_gain_loss',
-        'gain_loss_on_sale_of_ppe',
-        'gain_loss_on_sale_of_business',
-        'net_income_from_continuing_operations'
-    ]
 
-    # SQL placeholders
-    placeholders = sql.SQL(', ').join(sql.Placeholder() for _ in db_columns)
+@timed_write("cashflows")
+def bulk_insert_cashflows(rows, connection=None):
+    """
+    Bulk-load cashflow rows built by cashflow_rows, for one or many tickers.
+    """
+    return copy_rows("cashflows", ["ticker_id", "report_date"] + CASHFLOW_COLUMNS, rows, connection)
 
-    insert_query = sql.SQL("""
-        INSERT INTO cashflows (
-            ticker_id, report_date, {columns}
-        ) VALUES (%s, %s, {placeholders})
-        ON CONFLICT DO NOTHING
-    """).format(
-        columns=sql.SQL(', ').join(map(sql.Identifier, db_columns)),
-        placeholders=placeholders
-    )
 
-    def sanitize(value):
-        """Sanitize value for database insertion."""
-        return value if value is not None else None
+def insert_cashflow(cashflow, symbol, connection=None, ticker_id=None):
+
+    if not isinstance(cashflow, dict):
+        raise ValueError("cashflow must be a dictionary.")
+    if not isinstance(symbol, str) or not symbol.strip():
+        raise ValueError("symbol must be a non-empty string.")
 
     try:
-        with get_db_connection() as conn:
-            ticker_id = fetch_ticker_id(symbol, conn)
+        with pooled_connection(connection) as conn:
+            if ticker_id is None:
+                ticker_id = fetch_ticker_id(symbol, conn)
             if ticker_id is None:
                 raise ValueError(f"Ticker '{symbol}' not found.")
             
             logging.info(f"Inserting cashflow data for ticker ID: {ticker_id}")
             
-            values = [
-                (ticker_id, report_date) + tuple(
-                    sanitize(row_data.get(key)) for key in cashflow_keys
-                )
-                for report_date, row_data in cashflow.items()
-            ]
+            values = cashflow_rows(cashflow, ticker_id)
 
             if not values:
                 logging.warning("No cashflow data to insert.")
                 return
 
-            with conn.cursor() as cursor:
-                # Log the query and values for debugging
-                logging.debug(f"Insert query: {insert_query.as_string(conn)}")
-                logging.info(f"Values: {values}")
-
-                # Execute batch insertion
-                execute_batch(cursor, insert_query, values)
-            conn.commit()
+            bulk_insert_cashflows(values, conn)
 
             logging.info(f"Successfully inserted cashflow data for symbol: {symbol}")
 
@@ -686,189 +1113,230 @@ def insert_cashflow(cashflow, symbol):
 
 
 
-def update_tickers_data(ticker_data, symbol):
-    if not isinstance(symbol, str) or not symbol.strip():
-        raise ValueError("symbol must be a non-empty string.")
-    conn = get_db_connection()
-    insert_query = sql.SQL(
+def fast_info_row(fast_info, symbol):
+    """
+    Map a fast_info mapping to a row for bulk_update_tickers.
+    """
+    return tuple(fast_info.get(key) for key in FAST_INFO_KEYS) + (symbol,)
+
+
+@timed_write("tickers")
+def bulk_update_tickers(rows, connection=None, columns=None):
+    """
+    Update the fast-info columns of many tickers with a single UPDATE ... FROM (VALUES ...) per page.
+    Tickers whose fast-info columns are unchanged are not rewritten.
+    :param rows: Row tuples built by fast_info_row, or matching columns followed by the ticker symbol.
+    :param connection: Optional database connection for reuse.
+    :param columns: Columns to update, FAST_INFO_COLUMNS by default.
+    """
+    columns = columns or FAST_INFO_COLUMNS
+    update_query = sql.SQL(
         """
-        UPDATE {}
-        SET day_high = %s,
-        day_low = %s,
-        fifty_day_average = %s,
-        last_price = %s,
-        last_volume = %s,
-        market_cap = %s,
-        open = %s,
-        previous_close = %s,
-        regular_market_previous_close = %s,
-        year_high = %s,
-        year_low = %s,
-        shares = %s,
-        ten_day_average_volume = %s,
-        three_month_average_volume = %s,
-        two_hundred_day_average = %s,
-        yearChange = %s
-        WHERE ticker = %s
+        UPDATE {} AS t
+        SET {assignments}
+        FROM (VALUES %s) AS v ({columns}, ticker)
+        WHERE t.ticker = v.ticker
+          AND ({current}) IS DISTINCT FROM ({incoming})
         """
-    ).format(sql.Identifier('tickers'))
+    ).format(
+        sql.Identifier('tickers'),
+        assignments=sql.SQL(', ').join(
+            sql.SQL("{} = v.{}").format(sql.Identifier(column), sql.Identifier(column))
+            for column in columns
+        ),
+        columns=sql.SQL(', ').join(map(sql.Identifier, columns)),
+        current=sql.SQL(', ').join(sql.SQL("t.{}").format(sql.Identifier(column)) for column in columns),
+        incoming=sql.SQL(', ').join(sql.SQL("v.{}").format(sql.Identifier(column)) for column in columns)
+    )
+    # NULLs in a VALUES list are typed as text, so cast every fast-info value explicitly
+    template = "(" + ", ".join(["%s::numeric"] * len(columns)) + ", %s)"
 
-    try:
-        if not isinstance(symbol, str) or not symbol.strip():
-            raise ValueError("symbol must be a non-empty string.")
+    with pooled_connection(connection) as conn, conn.cursor() as cursor:
+        return execute_values_rowcount(cursor, update_query.as_string(conn), rows, template=template, page_size=1000)
 
-        with conn.cursor() as cursor:
-            cursor.execute(insert_query,
-                    (ticker_data.get("dayHigh"),
-                    ticker_data.get("dayLow"),
-                    ticker_data.get("fiftyDayAverage"),
-                    ticker_data.get("lastPrice"),
-                    ticker_data.get("lastVolume"),
-                    ticker_data.get("marketCap"),
-                    ticker_data.get("open"),
-                    ticker_data.get("previousClose"),
-                    ticker_data.get("regularMarketPreviousClose"),
-                    ticker_data.get("yearHigh"),
-                    ticker_data.get("yearLow"),
-                    ticker_data.get("shares"),
-                    ticker_data.get("tenDayAverageVolume"),
-                    ticker_data.get("threeMonthAverageVolume"),
-                    ticker_data.get("twoHundredDayAverage"),
-                    ticker_data.get("yearChange"),symbol))
-        conn.commit()
+
+def update_tickers_data(ticker_data, symbol, connection=None):
+    if not isinstance(symbol, str) or not symbol.strip():
+        raise ValueError("symbol must be a non-empty string.")
+
+    try:
+        bulk_update_tickers([fast_info_row(ticker_data, symbol)], connection)
         logging.info(f"Security data for '{symbol}' updated successfully.")
 
     except Exception as e:
         logging.error(f"Failed to update ticker data for '{symbol}': {e}")
         raise Exception(f"Failed to update security data: {e}")
-        
-def insert_company_data(json_data):
+
+
+# Database column names of the 'company' table
+COMPANY_COLUMNS = [
+    "ticker_id", "short_name", "long_name", "industry", "industry_key", "industry_disp",
+    "sector", "sector_key", "sector_disp", "address1", "address2", "city",
+    "zip", "country", "phone", "fax", "website", "long_business_summary",
+    "full_time_employees", "currency", "exchange", "quote_type", "symbol", "underlying_symbol"
+]
+
+
+def company_row(json_data, ticker_id):
     """
-    Insert company data into the 'company' table based on JSON input.
-    :param json_data: dict containing company-related data.
+    Map a yfinance info dictionary to a 'company' row tuple, using defaults where necessary.
+    """
+    return (
+        ticker_id,
+        json_data.get("shortName",""),
+        json_data.get("longName",""),
+        json_data.get("industry",""),
+        json_data.get("industryKey",""),
+        json_data.get("industryDisp",""),
+        json_data.get("sector",""),
+        json_data.get("sectorKey",""),
+        json_data.get("sectorDisp",""),
+        json_data.get("address1",""),
+        json_data.get("address2",""),
+        json_data.get("city",""),
+        json_data.get("zip",""),
+        json_data.get("country",""),
+        json_data.get("phone",""),
+        json_data.get("fax",""),
+        json_data.get("website",""),
+        json_data.get("longBusinessSummary",""),
+        json_data.get("fullTimeEmployees",0),
+        json_data.get("currency",""),
+        json_data.get("exchange",""),
+        json_data.get("quoteType",""),
+        json_data.get("symbol",""),
+        json_data.get("underlyingSymbol",""),
+    )
+
+
+@timed_write("company")
+def bulk_upsert_company(rows, connection=None):
     """
-    conn = get_db_connection()
-    insert_query = sql.SQL(
+    Insert or update company rows built by company_row, for one or many tickers.
+    Rows whose contents are unchanged are left alone rather than rewritten.
+    Only the last row per ticker is kept, since one statement cannot update a row twice.
+    """
+    rows = list({row[0]: row for row in rows}.values())
+    upsert_query = sql.SQL(
         """
-        INSERT INTO {} (
-            ticker_id,
-            short_name,
-            long_name,
-            industry,
-            industry_key,
-            industry_disp,
-            sector,
-            sector_key,
-            sector_disp,
-            address1,
-            address2,
-            city,
-            zip,
-            country,
-            phone,
-            fax,
-            website,
-            long_business_summary,
-            full_time_employees,
-            currency,
-            exchange,
-            quote_type,
-            symbol,
-            underlying_symbol
-        )
-        VALUES (
-            %s, %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s, %s
-        )
+        INSERT INTO {} ({columns})
+        VALUES %s
         ON CONFLICT (ticker_id)
-        DO UPDATE SET
-            short_name = EXCLUDED.short_name,
-            long_name = EXCLUDED.long_name,
-            industry = EXCLUDED.industry,
-            industry_key = EXCLUDED.industry_key,
-            industry_disp = EXCLUDED.industry_disp,
-            sector = EXCLUDED.sector,
-            sector_key = EXCLUDED.sector_key,
-            sector_disp = EXCLUDED.sector_disp,
-            address1 = EXCLUDED.address1,
-            address2 = EXCLUDED.address2,
-            city = EXCLUDED.city,
-            zip = EXCLUDED.zip,
-            country = EXCLUDED.country,
-            phone = EXCLUDED.phone,
-            fax = EXCLUDED.fax,
-            website = EXCLUDED.website,
-            long_business_summary = EXCLUDED.long_business_summary,
-            full_time_employees = EXCLUDED.full_time_employees,
-            currency = EXCLUDED.currency,
-            exchange = EXCLUDED.exchange,
-            quote_type = EXCLUDED.quote_type,
-            symbol = EXCLUDED.symbol,
-            underlying_symbol = EXCLUDED.underlying_symbol
+        DO UPDATE SET {assignments}
+        WHERE ({current}) IS DISTINCT FROM ({excluded})
         """
-    ).format(sql.Identifier('company'))
+    ).format(
+        sql.Identifier('company'),
+        columns=sql.SQL(', ').join(map(sql.Identifier, COMPANY_COLUMNS)),
+        assignments=sql.SQL(', ').join(
+            sql.SQL("{} = EXCLUDED.{}").format(sql.Identifier(column), sql.Identifier(column))
+            for column in COMPANY_COLUMNS[1:]
+        ),
+        current=sql.SQL(', ').join(
+            sql.SQL("{}.{}").format(sql.Identifier('company'), sql.Identifier(column))
+            for column in COMPANY_COLUMNS[1:]
+        ),
+        excluded=sql.SQL(', ').join(
+            sql.SQL("EXCLUDED.{}").format(sql.Identifier(column)) for column in COMPANY_COLUMNS[1:]
+        )
+    )
+
+    with pooled_connection(connection) as conn, conn.cursor() as cursor:
+        return execute_values_rowcount(cursor, upsert_query.as_string(conn), rows, page_size=1000)
 
 
+def insert_company_data(json_data, connection=None, ticker_id=None):
+    """
+    Insert company data into the 'company' table based on JSON input.
+    :param json_data: dict containing company-related data.
+    :param connection: Optional database connection for reuse.
+    :param ticker_id: Optional ticker id, looked up from the symbol when not given.
+    """
     try:
-        # Extract and prepare data from JSON
-        ticker_id = fetch_ticker_id(json_data.get('symbol'), conn)
-        if ticker_id is None:
-            raise ValueError(f"Ticker '{json_data.get('symbol')}' not found.")
-        
-        logging.info(ticker_id)
-
-
-        # Extract values, using defaults where necessary
-        company_values = (
-            ticker_id,
-            json_data.get("shortName",""),
-            json_data.get("longName",""),
-            json_data.get("industry",""),
-            json_data.get("industryKey",""),
-            json_data.get("industryDisp",""),
-            json_data.get("sector",""),
-            json_data.get("sectorKey",""),
-            json_data.get("sectorDisp",""),
-            json_data.get("address1",""),
-            json_data.get("address2",""),
-            json_data.get("city",""),
-            json_data.get("zip",""),
-            json_data.get("country",""),
-            json_data.get("phone",""),
-            json_data.get("fax",""),
-            json_data.get("website",""),
-            json_data.get("longBusinessSummary",""),
-            json_data.get("fullTimeEmployees",0),
-            json_data.get("currency",""),
-            json_data.get("exchange",""),
-            json_data.get("quoteType",""),
-            json_data.get("symbol",""),
-            json_data.get("underlyingSymbol",""),
-        )
-        
-        # Insert data into the database
-        with conn.cursor() as cursor:
-            cursor.execute(insert_query, company_values)
-        conn.commit()
-        logging.info(f"Company data for '{json_data.get('symbol')}' inserted/updated successfully.")
+        with pooled_connection(connection) as conn:
+            if ticker_id is None:
+                ticker_id = fetch_ticker_id(json_data.get('symbol'), conn)
+            if ticker_id is None:
+                raise ValueError(f"Ticker '{json_data.get('symbol')}' not found.")
+
+            bulk_upsert_company([company_row(json_data, ticker_id)], conn)
+            logging.info(f"Company data for '{json_data.get('symbol')}' inserted/updated successfully.")
 
     except Exception as e:
-        conn.rollback()
         raise Exception(f"Failed to insert/update company data: {e}")
 
-    finally:
-        conn.close()
-        
 
-def insert_financial_metrics(financial_metrics, symbol):
+# Keys in the yfinance info dictionary
+FINANCIAL_METRICS_KEYS = [
+    'priceHint', 'previousClose', 'open', 'dayLow', 'dayHigh',
+    'regularMarketPreviousClose', 'regularMarketOpen', 'regularMarketDayLow',
+    'regularMarketDayHigh', 'dividendRate', 'dividendYield', 'exDividendDate',
+    'payoutRatio', 'fiveYearAvgDividendYield', 'beta', 'trailingPE', 'forwardPE',
+    'volume', 'regularMarketVolume', 'averageVolume', 'averageVolume10days', 'ask',
+    'marketCap', 'fiftyTwoWeekLow', 'fiftyTwoWeekHigh', 'priceToSalesTrailing12Months',
+    'fiftyDayAverage', 'twoHundredDayAverage', 'trailingAnnualDividendRate',
+    'trailingAnnualDividendYield', 'enterpriseValue', 'profitMargins', 'floatShares',
+    'sharesOutstanding', 'heldPercentInsiders', 'heldPercentInstitutions',
+    'impliedSharesOutstanding', 'bookValue', 'priceToBook', 'lastFiscalYearEnd',
+    'nextFiscalYearEnd', 'mostRecentQuarter', 'earningsQuarterlyGrowth',
+    'netIncomeToCommon', 'trailingEPS', 'forwardEPS', 'lastSplitFactor',
+    'lastSplitDate', 'enterpriseToRevenue', 'enterpriseToEbitda', 'revenueGrowth',
+    'freeCashflow'
+]
+
+# Database column names of the 'financial_metrics' table, in the same order as FINANCIAL_METRICS_KEYS
+FINANCIAL_METRICS_COLUMNS = [
+    'price_hint', 'previous_close', 'open_price', 'day_low', 'day_high',
+    'regular_market_previous_close', 'regular_market_open', 'regular_market_day_low',
+    'regular_market_day_high', 'dividend_rate', 'dividend_yield', 'ex_dividend_date',
+    'payout_ratio', 'five_year_avg_dividend_yield', 'beta', 'trailing_pe', 'forward_pe',
+    'volume', 'regular_market_volume', 'average_volume', 'average_volume_10days', 'ask',
+    'market_cap', 'fifty_two_week_low', 'fifty_two_week_high', 'price_to_sales_trailing_12_months',
+    'fifty_day_average', 'two_hundred_day_average', 'trailing_annual_dividend_rate',
+    'trailing_annual_dividend_yield', 'enterprise_value', 'profit_margins', 'float_shares',
+    'shares_outstanding', 'held_percent_insiders', 'held_percent_institutions',
+    'implied_shares_outstanding', 'book_value', 'price_to_book', 'last_fiscal_year_end',
+    'next_fiscal_year_end', 'most_recent_quarter', 'earnings_quarterly_growth',
+    'net_income_to_common', 'trailing_eps', 'forward_eps', 'last_split_factor',
+    'last_split_date', 'enterprise_to_revenue', 'enterprise_to_ebitda', 'revenue_growth',
+    'free_cash_flow'
+]
+
+
+def financial_metrics_row(financial_metrics, ticker_id):
+    """
+    Map a yfinance info dictionary to a 'financial_metrics' row tuple.
+    """
+    return (ticker_id,) + tuple(financial_metrics.get(key) for key in FINANCIAL_METRICS_KEYS)
+
+
+@timed_write("financial_metrics")
+def bulk_insert_financial_metrics(rows, connection=None):
+    """
+    Insert financial metrics rows built by financial_metrics_row, for one or many tickers.
+    """
+    insert_query = sql.SQL("""
+        INSERT INTO financial_metrics (
+            ticker_id, {columns}
+        ) VALUES %s
+        ON CONFLICT (ticker_id) DO NOTHING
+    """).format(
+        columns=sql.SQL(', ').join(map(sql.Identifier, FINANCIAL_METRICS_COLUMNS))
+    )
+
+    with pooled_connection(connection) as conn, conn.cursor() as cursor:
+        return execute_values_rowcount(cursor, insert_query.as_string(conn), rows, page_size=1000)
+
+
+def insert_financial_metrics(financial_metrics, symbol, connection=None, ticker_id=None):
     """
     Inserts financial metrics for a given symbol into the financial_metrics table.
 
     Args:
         financial_metrics (dict): A dictionary containing the financial metrics data.
         symbol (str): The stock ticker symbol (e.g., 'AAPL').
+        connection: Optional database connection for reuse.
+        ticker_id (int): Optional ticker id, looked up from symbol when not given.
 
     Raises:
         ValueError: If the input data is invalid.
@@ -878,91 +1346,276 @@ def insert_financial_metrics(financial_metrics, symbol):
         raise ValueError("financial_metrics must be a dictionary.")
     if not isinstance(symbol, str) or not symbol.strip():
         raise ValueError("symbol must be a non-empty string.")
-    
-    # Database column names
-    financial_metrics_keys = [
-        'priceHint', 'previousClose', 'open', 'dayLow', 'dayHigh',
-        'regularMarketPreviousClose', 'regularMarketOpen', 'regularMarketDayLow',
-        'regularMarketDayHigh', 'dividendRate', 'dividendYield', 'exDividendDate',
-        'payoutRatio', 'fiveYearAvgDividendYield', 'beta', 'trailingPE', 'forwardPE',
-        'volume', 'regularMarketVolume', 'averageVolume', 'averageVolume10days', 'ask',
-        'marketCap', 'fiftyTwoWeekLow', 'fiftyTwoWeekHigh', 'priceToSalesTrailing12Months',
-        'fiftyDayAverage', 'twoHundredDayAverage', 'trailingAnnualDividendRate',
-        'trailingAnnualDividendYield', 'enterpriseValue', 'profitMargins', 'floatShares',
-        'sharesOutstanding', 'heldPercentInsiders', 'heldPercentInstitutions',
-        'impliedSharesOutstanding', 'bookValue', 'priceToBook', 'lastFiscalYearEnd',
-        'nextFiscalYearEnd', 'mostRecentQuarter', 'earningsQuarterlyGrowth',
-        'netIncomeToCommon', 'trailingEPS', 'forwardEPS', 'lastSplitFactor',
-        'lastSplitDate', 'enterpriseToRevenue', 'enterpriseToEbitda', 'revenueGrowth',
-        'freeCashflow'
-    ]
-
-    # Keys in the financial_metrics dictionary (normalized to lowercase for DB column matching)
-    db_columns = [
-        'price_hint', 'previous_close', 'open_price', 'day_low', 'day_high',
-        'regular_market_previous_close', 'regular_market_open', 'regular_market_day_low',
-        'regular_market_day_high', 'dividend_rate', 'dividend_yield', 'ex_dividend_date',
-        'payout_ratio', 'five_year_avg_dividend_yield', 'beta', 'trailing_pe', 'forward_pe',
-        'volume', 'regular_market_volume', 'average_volume', 'average_volume_10days', 'ask',
-        'market_cap', 'fifty_two_week_low', 'fifty_two_week_high', 'price_to_sales_trailing_12_months',
-        'fifty_day_average', 'two_hundred_day_average', 'trailing_annual_dividend_rate',
-        'trailing_annual_dividend_yield', 'enterprise_value', 'profit_margins', 'float_shares',
-        'shares_outstanding', 'held_percent_insiders', 'held_percent_institutions',
-        'implied_shares_outstanding', 'book_value', 'price_to_book', 'last_fiscal_year_end',
-        'next_fiscal_year_end', 'most_recent_quarter', 'earnings_quarterly_growth',
-        'net_income_to_common', 'trailing_eps', 'forward_eps', 'last_split_factor',
-        'last_split_date', 'enterprise_to_revenue', 'enterprise_to_ebitda', 'revenue_growth',
-        'free_cash_flow'
-    ]
-    
-    # SQL placeholders
-    placeholders = sql.SQL(', ').join(sql.Placeholder() for _ in db_columns)
-
-    insert_query = sql.SQL("""
-        INSERT INTO financial_metrics (
-            ticker_id, {columns}
-        ) VALUES (%s, {placeholders})
-        ON CONFLICT (ticker_id) DO NOTHING
-    """).format(
-        columns=sql.SQL(', ').join(map(sql.Identifier, db_columns)),
-        placeholders=placeholders
-    )
-
-    def sanitize(value):
-        """Sanitize value for database insertion."""
-        return value if value is not None else None
 
     try:
         # Connect to the database
-        with get_db_connection() as conn:
-            ticker_id = fetch_ticker_id(symbol, conn)
+        with pooled_connection(connection) as conn:
+            if ticker_id is None:
+                ticker_id = fetch_ticker_id(symbol, conn)
             if ticker_id is None:
                 raise ValueError(f"Ticker '{symbol}' not found.")
             
             logging.info(f"Inserting financial metrics data for ticker ID: {ticker_id}")
-            
-            # Map the financial_metrics data to match database columns
-            values = [
-                (ticker_id,) + tuple(
-                    sanitize(financial_metrics.get(key)) for key in financial_metrics_keys
-                )
-            ]
-            
-            if not values:
-                logging.warning("No financial metrics data to insert.")
-                return
-
-            with conn.cursor() as cursor:
-                # Log the query and values for debugging
-                logging.debug(f"Insert query: {insert_query.as_string(conn)}")
-                logging.info(f"Values: {values}")
 
-                # Execute the insert query
-                execute_batch(cursor, insert_query, values)
-            conn.commit()
+            bulk_insert_financial_metrics([financial_metrics_row(financial_metrics, ticker_id)], conn)
 
             logging.info(f"Successfully inserted financial metrics data for symbol: {symbol}")
 
     except Exception as e:
         logging.error(f"Failed to insert financial metrics data for symbol '{symbol}': {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+# ticker_id -> {dataset: (last_fetched_at, latest_date, content_hash)}, loaded from 'ingestion_state'
+_ingestion_state_cache = {}
+_ingestion_state_cache_lock = threading.Lock()
+
+# Datasets fetched for every ticker, in fetch order
+DATASETS = ("info", "dividends", "balance_sheet", "fast_info", "cashflow")
+
+# Datasets keyed by report or action date, whose watermark is the latest date stored
+DATED_DATASETS = ("dividends", "balance_sheet", "cashflow")
+
+# Payload key under which providers attach {dataset: (fetched_at, payload)} for the
+# datasets they actually fetched from Yahoo, to be landed in 'raw_payloads'
+RAW_PAYLOADS_KEY = "raw_payloads"
+
+
+def load_ingestion_state(connection=None):
+    """
+    Load every ingestion watermark from the 'ingestion_state' table in a single query,
+    replacing the current contents of the in-memory cache.
+    """
+    query = sql.SQL("SELECT ticker_id, dataset, last_fetched_at, latest_date, content_hash FROM ingestion_state")
+    try:
+        rows = execute_query(query, fetch_all=True, connection=connection) or []
+        with _ingestion_state_cache_lock:
+            _ingestion_state_cache.clear()
+            for ticker_id, dataset, *state in rows:
+                _ingestion_state_cache.setdefault(ticker_id, {})[dataset] = tuple(state)
+        logging.info(f"Loaded {len(rows)} ingestion watermarks into the cache.")
+        return len(rows)
+    except Exception as e:
+        logging.error(f"Failed to load ingestion state: {e}")
+        raise
+
+def fetch_ingestion_state(ticker_id):
+    """
+    Return {dataset: (last_fetched_at, latest_date, content_hash)} for a ticker from the in-memory cache.
+    """
+    with _ingestion_state_cache_lock:
+        return dict(_ingestion_state_cache.get(ticker_id, {}))
+
+def report_day(value):
+    """
+    Calendar date of a report or action date key as returned by yfinance.
+    """
+    return pd.Timestamp(value).date()
+
+def newer_than(dated_data, watermark):
+    """
+    Keep the entries of a date-keyed payload that are dated after the watermark.
+    """
+    if watermark is None:
+        return dated_data
+    return {date: data for date, data in dated_data.items() if report_day(date) > watermark}
+
+def content_hash(rows):
+    """
+    Stable hash of the row tuples built from a payload, used to detect unchanged data.
+    """
+    encoded = json.dumps(rows, default=str, separators=(",", ":")).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+def ingestion_state_rows(payloads, ticker_id, fetched_at=None, content_hashes=None):
+    """
+    Map the datasets fetched for one ticker to 'ingestion_state' row tuples recording
+    the fetch time, the latest date received for dated datasets and the content hash
+    of the rows built from undated ones.
+    """
+    fetched_at = fetched_at or datetime.datetime.now(datetime.timezone.utc)
+    content_hashes = content_hashes or {}
+    rows = []
+    for dataset, payload in payloads.items():
+        latest_date = None
+        if dataset in DATED_DATASETS and payload:
+            latest_date = max(report_day(date) for date in payload)
+        rows.append((ticker_id, dataset, fetched_at, latest_date, content_hashes.get(dataset)))
+    return rows
+
+@timed_write("ingestion_state")
+def bulk_upsert_ingestion_state(rows, connection=None):
+    """
+    Upsert ingestion watermarks. A watermark's latest_date never moves backwards.
+    """
+    query = sql.SQL(
+        """
+        INSERT INTO ingestion_state (ticker_id, dataset, last_fetched_at, latest_date, content_hash)
+        VALUES %s
+        ON CONFLICT (ticker_id, dataset) DO UPDATE SET
+            last_fetched_at = EXCLUDED.last_fetched_at,
+            latest_date = GREATEST(ingestion_state.latest_date, EXCLUDED.latest_date),
+            content_hash = EXCLUDED.content_hash
+        """
+    )
+    # Several buffered rows for the same key would make one statement update a row twice
+    rows = list({(row[0], row[1]): row for row in rows}.values())
+    with pooled_connection(connection) as conn:
+        with conn.cursor() as cursor:
+            return execute_values_rowcount(cursor, query, rows)
+
+
+def ticker_payload_rows(symbol, payloads, ticker_id):
+    """
+    Map every dataset fetched for one ticker to row tuples, keyed by target table.
+    Datasets missing from payloads are skipped, and dated rows no newer than the
+    ticker's ingestion watermark are dropped since they are already stored. Company,
+    financial metrics and fast-info rows are dropped when their content hash matches
+    the one recorded by the previous run. Raw payloads attached under RAW_PAYLOADS_KEY
+    become 'raw_payloads' rows.
+    :param symbol: The stock ticker symbol.
+    :param payloads: dict with any of 'info', 'dividends', 'balance_sheet', 'fast_info' and 'cashflow'.
+    :param ticker_id: Id of the ticker in the 'tickers' table.
+    """
+    raw_payloads = payloads.get(RAW_PAYLOADS_KEY)
+    payloads = {dataset: payload for dataset, payload in payloads.items() if dataset != RAW_PAYLOADS_KEY}
+    state = fetch_ingestion_state(ticker_id)
+    watermarks = {dataset: entry[1] for dataset, entry in state.items()}
+    stored_hashes = {dataset: entry[2] for dataset, entry in state.items()}
+    dated = {
+        dataset: newer_than(payloads[dataset], watermarks.get(dataset))
+        for dataset in DATED_DATASETS if dataset in payloads
+    }
+
+    table_rows = {}
+    content_hashes = {}
+    if "info" in payloads:
+        info_rows = {
+            "company": [company_row(payloads["info"], ticker_id)],
+            "financial_metrics": [financial_metrics_row(payloads["info"], ticker_id)],
+        }
+        content_hashes["info"] = content_hash(list(info_rows.values()))
+        if content_hashes["info"] != stored_hashes.get("info"):
+            table_rows.update(info_rows)
+    if "dividends" in dated:
+        table_rows["dividends"] = dividend_rows(dated["dividends"], ticker_id)
+    if "balance_sheet" in dated:
+        table_rows["balance_sheets"] = balance_sheet_rows(dated["balance_sheet"], ticker_id)
+    if "cashflow" in dated:
+        table_rows["cashflows"] = cashflow_rows(dated["cashflow"], ticker_id)
+    if "fast_info" in payloads:
+        ticker_rows = [fast_info_row(payloads["fast_info"], symbol)]
+        content_hashes["fast_info"] = content_hash(ticker_rows)
+        if content_hashes["fast_info"] != stored_hashes.get("fast_info"):
+            table_rows["tickers"] = ticker_rows
+    if raw_payloads:
+        table_rows["raw_payloads"] = raw_payload_rows(raw_payloads, ticker_id)
+    table_rows["ingestion_state"] = ingestion_state_rows(payloads, ticker_id, content_hashes=content_hashes)
+    return table_rows
+
+
+def json_ready(value):
+    """
+    Convert a yfinance payload to JSON-compatible values: timestamps become ISO strings,
+    NumPy scalars become Python numbers and NaN or infinite floats become null.
+    """
+    if isinstance(value, dict):
+        return {
+            key.isoformat() if hasattr(key, "isoformat") else str(key): json_ready(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [json_ready(item) for item in value]
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if value is None or isinstance(value, (str, int, bool)):
+        return value
+    if hasattr(value, "item"):
+        return json_ready(value.item())
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+def raw_payload_rows(raw_payloads, ticker_id):
+    """
+    Map {dataset: (fetched_at, payload)} fetched for one ticker to 'raw_payloads' row tuples.
+    """
+    return [
+        (ticker_id, dataset, fetched_at, json.dumps(json_ready(payload)))
+        for dataset, (fetched_at, payload) in raw_payloads.items()
+    ]
+
+@timed_write("raw_payloads")
+def bulk_insert_raw_payloads(rows, connection=None):
+    """
+    Append raw payload rows built by raw_payload_rows to the landing zone.
+    """
+    query = sql.SQL(
+        "INSERT INTO raw_payloads (ticker_id, dataset, fetched_at, payload) VALUES %s ON CONFLICT DO NOTHING"
+    )
+    with pooled_connection(connection) as conn, conn.cursor() as cursor:
+        return execute_values_rowcount(cursor, query.as_string(conn), rows, template="(%s, %s, %s, %s::jsonb)", page_size=100)
+
+def fetch_raw_payloads(ticker_id, datasets, connection=None):
+    """
+    Return {dataset: payload} with the most recently landed payload of each dataset of a ticker.
+    Payloads come back as stored, with timestamp keys as ISO strings.
+    """
+    query = sql.SQL(
+        """
+        SELECT DISTINCT ON (dataset) dataset, payload
+        FROM raw_payloads
+        WHERE ticker_id = %s AND dataset = ANY(%s)
+        ORDER BY dataset, fetched_at DESC
+        """
+    )
+    rows = execute_query(query, (ticker_id, list(datasets)), fetch_all=True, connection=connection) or []
+    return dict(rows)
+
+
+# Multi-ticker writer for each table produced by ticker_payload_rows
+BULK_WRITERS = {
+    "company": bulk_upsert_company,
+    "financial_metrics": bulk_insert_financial_metrics,
+    "dividends": bulk_insert_dividends,
+    "balance_sheets": bulk_insert_balance_sheets,
+    "cashflows": bulk_insert_cashflows,
+    "tickers": bulk_update_tickers,
+    "raw_payloads": bulk_insert_raw_payloads,
+    # Last, so watermarks only advance once the rows they describe are written
+    "ingestion_state": bulk_upsert_ingestion_state,
+}
+
+
+def write_table_rows(table_rows, connection=None):
+    """
+    Write rows for several tables, as returned by ticker_payload_rows, in one transaction.
+    """
+    with pooled_connection(connection) as conn:
+        for table, rows in table_rows.items():
+            if rows:
+                BULK_WRITERS[table](rows, conn)
+
+
+def insert_ticker_payloads(symbol, payloads, connection=None):
+    """
+    Write every dataset fetched for one ticker as a single unit of work.
+    The ticker id is resolved once and company, financial metrics, dividends,
+    balance sheet, cashflow and fast-info are written on one connection and
+    committed together, so a failure leaves none of them half-written.
+    :param symbol: The stock ticker symbol.
+    :param payloads: dict with any of 'info', 'dividends', 'balance_sheet', 'fast_info' and 'cashflow'.
+    :param connection: Optional database connection; the caller then owns the transaction.
+    """
+    try:
+        with pooled_connection(connection) as conn:
+            ticker_id = fetch_ticker_id(symbol, conn)
+            if ticker_id is None:
+                raise ValueError(f"Ticker '{symbol}' not found.")
+
+            write_table_rows(ticker_payload_rows(symbol, payloads, ticker_id), conn)
+
+        logging.info(f"Committed all datasets for ticker '{symbol}'.")
+    except Exception as e:
+        logging.error(f"Failed to write datasets for ticker '{symbol}': {e}")
+        raise
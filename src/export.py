@@ -0,0 +1,148 @@
+import os
+import json
+import shutil
+import logging
+import datetime
+import pandas as pd
+from psycopg2 import sql
+from db_utils import pooled_connection
+
+# Fundamentals tables exported to Parquet, and the ingestion dataset each one is built from
+EXPORT_TABLES = {
+    "balance_sheets": "balance_sheet",
+    "cashflows": "cashflow",
+    "financial_metrics": "info",
+}
+
+# PostgreSQL type oid of NUMERIC, returned as Decimal by psycopg2
+NUMERIC_OID = 1700
+
+MANIFEST_FILE = "manifest.json"
+
+
+def load_manifest(directory):
+    """
+    Load the export manifest, or an empty one if nothing has been exported yet.
+    """
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {"tables": {}}
+    with open(path, "r") as manifest_file:
+        return json.load(manifest_file)
+
+def save_manifest(directory, manifest):
+    """
+    Atomically replace the export manifest.
+    """
+    path = os.path.join(directory, MANIFEST_FILE)
+    with open(f"{path}.tmp", "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+def touched_ticker_ids(dataset, since, connection=None):
+    """
+    Return the ids of tickers whose dataset was ingested at or after since.
+    """
+    with pooled_connection(connection) as conn, conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT ticker_id FROM ingestion_state WHERE dataset = %s AND last_fetched_at >= %s",
+            (dataset, since)
+        )
+        return {ticker_id for (ticker_id,) in cursor.fetchall()}
+
+def fetch_bucket_frame(table, buckets, bucket_count, connection=None):
+    """
+    Read every row of table whose ticker falls in one of the given buckets as a DataFrame,
+    with NUMERIC columns converted to floats.
+    """
+    query = sql.SQL("SELECT *, ticker_id %% %s AS bucket FROM {} WHERE ticker_id %% %s = ANY(%s)").format(
+        sql.Identifier(table)
+    )
+    with pooled_connection(connection) as conn, conn.cursor() as cursor:
+        cursor.execute(query, (bucket_count, bucket_count, sorted(buckets)))
+        columns = [column.name for column in cursor.description]
+        numeric = [column.name for column in cursor.description if column.type_code == NUMERIC_OID]
+        frame = pd.DataFrame(cursor.fetchall(), columns=columns)
+    for column in numeric:
+        frame[column] = pd.to_numeric(frame[column])
+    return frame
+
+def export_table(table, frame, buckets, directory, version):
+    """
+    Write one Parquet file per bucket under <directory>/<table>/bucket=NNN/ and return
+    the manifest entries of the written buckets.
+    """
+    entries = {}
+    grouped = dict(tuple(frame.groupby("bucket"))) if not frame.empty else {}
+    for bucket in sorted(buckets):
+        bucket_frame = grouped.get(bucket, frame.iloc[0:0]).drop(columns="bucket")
+        bucket_dir = os.path.join(directory, table, f"bucket={bucket:03d}")
+        os.makedirs(bucket_dir, exist_ok=True)
+        file_name = f"part-v{version}.parquet"
+        path = os.path.join(bucket_dir, file_name)
+        bucket_frame.to_parquet(f"{path}.tmp", index=False)
+        os.replace(f"{path}.tmp", path)
+        entries[f"{bucket:03d}"] = {
+            "file": os.path.join(table, f"bucket={bucket:03d}", file_name),
+            "rows": len(bucket_frame),
+            "version": version,
+        }
+    return entries
+
+def remove_stale_files(directory, entries):
+    """
+    Delete the previous versions of the rewritten buckets, once the manifest no longer references them.
+    """
+    for entry in entries.values():
+        path = os.path.join(directory, entry["file"])
+        bucket_dir, current = os.path.split(path)
+        for name in os.listdir(bucket_dir):
+            if name.endswith(".parquet") and name != current:
+                os.remove(os.path.join(bucket_dir, name))
+
+def export_fundamentals(since=None, directory=None, bucket_count=None):
+    """
+    Export the fundamentals tables to Parquet for research jobs.
+
+    Rows are spread over bucket_count (EXPORT_BUCKETS, default 64) files per table by
+    ticker_id, under directory (EXPORT_DIR, default exports/fundamentals). Only buckets
+    holding a ticker ingested at or after since are rewritten; the first export, or
+    since=None, writes every bucket. manifest.json records the version, row count and
+    file of every bucket, and is replaced only after the new files are in place.
+    """
+    directory = directory or os.getenv("EXPORT_DIR", "exports/fundamentals")
+    bucket_count = bucket_count or int(os.getenv("EXPORT_BUCKETS", 64))
+    os.makedirs(directory, exist_ok=True)
+    manifest = load_manifest(directory)
+    if manifest.get("bucket_count", bucket_count) != bucket_count:
+        logging.warning("Export bucket count changed; rewriting every bucket.")
+        for table in EXPORT_TABLES:
+            shutil.rmtree(os.path.join(directory, table), ignore_errors=True)
+        manifest = {"tables": {}}
+    manifest["bucket_count"] = bucket_count
+
+    for table, dataset in EXPORT_TABLES.items():
+        table_manifest = manifest["tables"].get(table)
+        if since is None or table_manifest is None:
+            buckets = set(range(bucket_count))
+        else:
+            buckets = {ticker_id % bucket_count for ticker_id in touched_ticker_ids(dataset, since)}
+        if not buckets:
+            logging.info(f"No changes to export for {table}.")
+            continue
+
+        version = (table_manifest or {}).get("version", 0) + 1
+        frame = fetch_bucket_frame(table, buckets, bucket_count)
+        entries = export_table(table, frame, buckets, directory, version)
+
+        table_manifest = table_manifest or {"buckets": {}}
+        table_manifest["buckets"].update(entries)
+        table_manifest["version"] = version
+        table_manifest["exported_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        table_manifest["rows"] = sum(entry["rows"] for entry in table_manifest["buckets"].values())
+        manifest["tables"][table] = table_manifest
+        save_manifest(directory, manifest)
+        remove_stale_files(directory, entries)
+        logging.info(f"Exported {len(frame)} rows of {table} in {len(buckets)} buckets (version {version}).")
+
+    return manifest
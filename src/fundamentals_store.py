@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import shutil
+import logging
+import datetime
+import threading
+import numpy as np
+from psycopg2 import sql
+from db_utils import pooled_connection
+
+# Tables in the store, and whether each holds a series of report periods per ticker
+STORE_TABLES = {
+    "balance_sheets": True,
+    "cashflows": True,
+    "financial_metrics": False,
+}
+
+# Report periods kept per ticker for periodic tables, latest first
+DEFAULT_PERIODS = 8
+
+NUMERIC_TYPES = ("numeric", "integer", "bigint", "smallint", "double precision", "real")
+
+CURRENT_FILE = "CURRENT"
+
+
+def numeric_columns(table, connection=None):
+    """
+    Return the numeric value columns of a table, leaving out its id and ticker_id keys.
+    """
+    with pooled_connection(connection) as conn, conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = %s AND data_type IN %s
+              AND column_name NOT IN ('id', 'ticker_id')
+            ORDER BY ordinal_position
+            """,
+            (table, NUMERIC_TYPES)
+        )
+        return [name for (name,) in cursor.fetchall()]
+
+def fetch_table_arrays(table, columns, periodic, slots, periods, connection=None):
+    """
+    Read a table into float64 arrays indexed by ticker_id (and period, latest first for
+    periodic tables). Missing values are NaN. Periodic tables also return the report
+    dates as datetime64[D], with NaT where a ticker has fewer periods. Periodic tables
+    have no unique (ticker_id, report_date) key and older databases hold duplicates,
+    so only the most recently inserted row of each report is ranked.
+    """
+    values = sql.SQL(', ').join(sql.SQL("{}::float8").format(sql.Identifier(column)) for column in columns)
+    if periodic:
+        query = sql.SQL(
+            """
+            SELECT ticker_id, period, report_date, {values} FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY ticker_id ORDER BY report_date DESC) - 1 AS period
+                FROM (
+                    SELECT DISTINCT ON (ticker_id, report_date) *
+                    FROM {table}
+                    WHERE ticker_id IS NOT NULL
+                    ORDER BY ticker_id, report_date, id DESC
+                ) latest
+            ) ranked
+            WHERE period < %s
+            """
+        ).format(values=values, table=sql.Identifier(table))
+        params = (periods,)
+    else:
+        query = sql.SQL("SELECT ticker_id, 0, NULL, {values} FROM {table} WHERE ticker_id IS NOT NULL").format(
+            values=values, table=sql.Identifier(table)
+        )
+        params = None
+
+    with pooled_connection(connection) as conn, conn.cursor() as cursor:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+
+    shape = (slots, periods) if periodic else (slots,)
+    arrays = {column: np.full(shape, np.nan) for column in columns}
+    report_dates = np.full(shape, np.datetime64("NaT"), dtype="datetime64[D]") if periodic else None
+    if not rows:
+        return arrays, report_dates
+
+    ticker_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    index = (ticker_ids, np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))) \
+        if periodic else ticker_ids
+    matrix = np.array([row[3:] for row in rows], dtype=np.float64)
+    for position, column in enumerate(columns):
+        arrays[column][index] = matrix[:, position]
+    if periodic:
+        report_dates[index] = np.array([row[2] for row in rows], dtype="datetime64[D]")
+    return arrays, report_dates
+
+def build_fundamentals_store(directory=None, periods=None, keep_versions=2):
+    """
+    Rebuild the memory-mappable fundamentals store from the database.
+
+    Every numeric column of STORE_TABLES is written as a float64 .npy array indexed by
+    ticker_id, with a second axis of report periods (0 = latest) for balance sheets and
+    cashflows. Each build goes to a new version directory that the CURRENT file is then
+    switched to, so readers keep a consistent snapshot while a rebuild runs. Only the
+    newest keep_versions versions are kept. Returns the path of the new version.
+    """
+    directory = directory or os.getenv("FUNDAMENTALS_STORE_DIR", "store/fundamentals")
+    periods = periods or int(os.getenv("FUNDAMENTALS_STORE_PERIODS", DEFAULT_PERIODS))
+    started = time.perf_counter()
+
+    with pooled_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT ticker, id FROM tickers")
+        ticker_ids = dict(cursor.fetchall())
+    slots = max(ticker_ids.values(), default=0) + 1
+
+    version = datetime.datetime.now(datetime.timezone.utc).strftime("v%Y%m%dT%H%M%S%f")
+    build_dir = os.path.join(directory, f"{version}.tmp")
+    os.makedirs(build_dir)
+
+    metadata = {"version": version, "slots": slots, "periods": periods, "tables": {}}
+    for table, periodic in STORE_TABLES.items():
+        columns = numeric_columns(table)
+        arrays, report_dates = fetch_table_arrays(table, columns, periodic, slots, periods)
+        os.makedirs(os.path.join(build_dir, table))
+        for column, array in arrays.items():
+            np.save(os.path.join(build_dir, table, f"{column}.npy"), array)
+        if periodic:
+            np.save(os.path.join(build_dir, table, "report_date.npy"), report_dates)
+        metadata["tables"][table] = {"columns": columns, "periodic": periodic}
+
+    with open(os.path.join(build_dir, "tickers.json"), "w") as tickers_file:
+        json.dump(ticker_ids, tickers_file)
+    with open(os.path.join(build_dir, "metadata.json"), "w") as metadata_file:
+        json.dump(metadata, metadata_file, indent=2)
+
+    version_dir = os.path.join(directory, version)
+    os.replace(build_dir, version_dir)
+    current_path = os.path.join(directory, CURRENT_FILE)
+    with open(f"{current_path}.tmp", "w") as current_file:
+        current_file.write(version)
+    os.replace(f"{current_path}.tmp", current_path)
+
+    versions = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith("v") and not name.endswith(".tmp") and os.path.isdir(os.path.join(directory, name))
+    )
+    for old_version in versions[:-keep_versions]:
+        shutil.rmtree(os.path.join(directory, old_version), ignore_errors=True)
+
+    logging.info(
+        f"Built fundamentals store {version} for {len(ticker_ids)} tickers "
+        f"in {time.perf_counter() - started:.1f}s."
+    )
+    return version_dir
+
+
+class FundamentalsStore:
+    """
+    Read-only view of the fundamentals store built by build_fundamentals_store.
+
+    Column arrays are memory-mapped on first use and every accessor returns a NumPy
+    view into them, so lookups never copy data or touch the database:
+
+        store = FundamentalsStore()
+        store.latest("balance_sheets", "total_debt")[store.ticker_id("ABB")]
+        store.column("financial_metrics", "trailing_pe")  # every ticker's trailing P/E
+
+    Arrays are indexed by ticker_id; values missing in the database are NaN.
+    Call reload() to pick up a newer build.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.getenv("FUNDAMENTALS_STORE_DIR", "store/fundamentals")
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        """
+        Switch to the version the CURRENT file points at.
+        """
+        with open(os.path.join(self.directory, CURRENT_FILE), "r") as current_file:
+            version_dir = os.path.join(self.directory, current_file.read().strip())
+        with open(os.path.join(version_dir, "metadata.json"), "r") as metadata_file:
+            metadata = json.load(metadata_file)
+        with open(os.path.join(version_dir, "tickers.json"), "r") as tickers_file:
+            ticker_ids = json.load(tickers_file)
+        with self._lock:
+            self.version_dir = version_dir
+            self.metadata = metadata
+            self._ticker_ids = ticker_ids
+            self._arrays = {}
+
+    @property
+    def version(self):
+        return self.metadata["version"]
+
+    def ticker_id(self, symbol):
+        """
+        Return the ticker id of a symbol, or None if it is not in the store.
+        """
+        return self._ticker_ids.get(symbol)
+
+    def columns(self, table):
+        return list(self.metadata["tables"][table]["columns"])
+
+    def _array(self, table, name):
+        key = (table, name)
+        with self._lock:
+            array = self._arrays.get(key)
+            if array is None:
+                if table not in self.metadata["tables"]:
+                    raise KeyError(f"Table '{table}' is not in the fundamentals store.")
+                array = np.load(os.path.join(self.version_dir, table, f"{name}.npy"), mmap_mode="r")
+                self._arrays[key] = array
+        return array
+
+    def column(self, table, column):
+        """
+        Return a column as a read-only view: shape (tickers,) for financial_metrics,
+        (tickers, periods) with the latest period first for periodic tables.
+        """
+        return self._array(table, column)
+
+    def latest(self, table, column):
+        """
+        Return the latest reported value of a column for every ticker, as a view.
+        """
+        array = self._array(table, column)
+        return array[:, 0] if array.ndim == 2 else array
+
+    def report_dates(self, table):
+        """
+        Return the report dates of a periodic table as a (tickers, periods) datetime64 view.
+        """
+        return self._array(table, "report_date")
+
+    def value(self, table, column, symbol, period=0):
+        """
+        Return one value for a symbol, or NaN if it is unknown or missing.
+        """
+        ticker_id = self.ticker_id(symbol)
+        array = self._array(table, column)
+        if ticker_id is None or ticker_id >= len(array):
+            return float("nan")
+        return float(array[ticker_id, period] if array.ndim == 2 else array[ticker_id])
@@ -0,0 +1,86 @@
+import os
+import time
+import logging
+import functools
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram, start_http_server, write_to_textfile
+
+# Buckets in seconds, from a cached or local call up to a slow, retried Yahoo request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+YFINANCE_CALL_SECONDS = Histogram(
+    "ingest_yfinance_call_seconds", "Duration of yfinance calls per dataset.",
+    ["dataset"], buckets=LATENCY_BUCKETS,
+)
+DB_WRITE_SECONDS = Histogram(
+    "ingest_db_write_seconds", "Duration of database writes per table.",
+    ["table"], buckets=LATENCY_BUCKETS,
+)
+ROWS_WRITTEN = Counter("ingest_rows_written_total", "Rows written per table.", ["table"])
+ERRORS = Counter("ingest_errors_total", "Errors by ingestion stage and exception type.", ["stage", "error_type"])
+RETRIES = Counter("ingest_retries_total", "Retried calls per retry policy.", ["policy"])
+TICKERS_IN_FLIGHT = Gauge("ingest_tickers_in_flight", "Tickers currently being fetched or written.")
+TICKERS_PROCESSED = Counter("ingest_tickers_processed_total", "Tickers processed by outcome.", ["outcome"])
+
+
+def record_error(stage, error):
+    """
+    Count an error raised in the given stage.
+    """
+    ERRORS.labels(stage=stage, error_type=type(error).__name__).inc()
+
+def timed_call(histogram, stage, fn, *args, **kwargs):
+    """
+    Call fn, observing its duration in histogram and counting any error against stage.
+    """
+    started = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    except Exception as e:
+        record_error(stage, e)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - started)
+
+def timed_write(table):
+    """
+    Decorate a bulk writer fn(rows, connection=None) to time it and count the rows it writes.
+    The writer returns the number of rows the database actually inserted or changed, so
+    rows skipped by ON CONFLICT DO NOTHING or unchanged upserts are not counted.
+    """
+    def decorator(writer):
+        @functools.wraps(writer)
+        def wrapper(rows, *args, **kwargs):
+            written = timed_call(DB_WRITE_SECONDS.labels(table=table), "write", writer, rows, *args, **kwargs)
+            ROWS_WRITTEN.labels(table=table).inc(written or 0)
+            return written
+        return wrapper
+    return decorator
+
+
+_metrics_server_started = False
+
+def start_metrics_server():
+    """
+    Serve metrics in the Prometheus text format on METRICS_PORT, if it is set.
+    """
+    global _metrics_server_started
+    port = os.getenv("METRICS_PORT")
+    if not port or _metrics_server_started:
+        return
+    start_http_server(int(port))
+    _metrics_server_started = True
+    logging.info(f"Serving Prometheus metrics on port {port}.")
+
+def write_metrics_textfile():
+    """
+    Write all metrics to METRICS_TEXTFILE, if it is set, for the node exporter's
+    textfile collector. Used for batch runs that exit before they are scraped.
+    """
+    path = os.getenv("METRICS_TEXTFILE")
+    if not path:
+        return
+    try:
+        write_to_textfile(path, REGISTRY)
+        logging.info(f"Wrote Prometheus metrics to {path}.")
+    except Exception as e:
+        logging.error(f"Failed to write Prometheus metrics to {path}: {e}")
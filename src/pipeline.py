@@ -0,0 +1,200 @@
+import time
+import queue
+import logging
+import threading
+from collections import defaultdict
+from db_utils import fetch_ticker_id, pooled_connection, ticker_payload_rows, write_table_rows
+from metrics import TICKERS_IN_FLIGHT, TICKERS_PROCESSED, record_error
+
+# Marks the end of a stage's input; one is queued per consumer worker
+_DONE = object()
+
+
+def transform_payloads(item):
+    """
+    Map the raw payloads of one ticker to row tuples keyed by table.
+    """
+    symbol, payloads = item
+    ticker_id = fetch_ticker_id(symbol)
+    if ticker_id is None:
+        raise ValueError(f"Ticker '{symbol}' not found.")
+    return symbol, ticker_payload_rows(symbol, payloads, ticker_id)
+
+
+def merge_table_rows(items):
+    """
+    Concatenate the per-table rows of several tickers.
+    """
+    merged = defaultdict(list)
+    for _, table_rows in items:
+        for table, rows in table_rows.items():
+            merged[table].extend(rows)
+    return merged
+
+
+class IngestPipeline:
+    """
+    Staged ingestion pipeline: fetchers download raw payloads, transformers map them
+    to row tuples and loaders write them to PostgreSQL.
+
+    Each stage runs on its own pool of threads, and the stages are connected by
+    bounded queues so a slow stage applies backpressure to the ones before it.
+    Loaders drain up to load_batch_size tickers at a time and write them in one
+    transaction; if that fails, the batch is retried ticker by ticker so one bad
+    ticker cannot fail the others.
+    """
+
+    def __init__(self, fetch, fetch_workers=8, transform_workers=2, load_workers=2,
+                 queue_size=100, load_batch_size=50):
+        if min(fetch_workers, transform_workers, load_workers, queue_size, load_batch_size) < 1:
+            raise ValueError("Pipeline worker counts, queue size and batch size must be at least 1.")
+
+        self._fetch = fetch
+        self.fetch_workers = fetch_workers
+        self.transform_workers = transform_workers
+        self.load_workers = load_workers
+        self.queue_size = queue_size
+        self.load_batch_size = load_batch_size
+
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._failed_symbols = []
+
+    def _record(self, stage, processed=0, failed=0, busy=0.0, symbol=None):
+        # A ticker is in flight from the start of its fetch until it is loaded or fails
+        if stage == "load" and processed:
+            TICKERS_IN_FLIGHT.dec(processed)
+            TICKERS_PROCESSED.labels(outcome="succeeded").inc(processed)
+        if failed:
+            TICKERS_IN_FLIGHT.dec(failed)
+            TICKERS_PROCESSED.labels(outcome="failed").inc(failed)
+        with self._lock:
+            if symbol is not None:
+                self._failed_symbols.append(symbol)
+            stats = self._stats[stage]
+            stats["processed"] += processed
+            stats["failed"] += failed
+            stats["busy_time"] += busy
+
+    def _fetch_item(self, symbol):
+        TICKERS_IN_FLIGHT.inc()
+        return symbol, self._fetch(symbol)
+
+    def _run_stage(self, stage, handler, in_queue, out_queue):
+        while True:
+            item = in_queue.get()
+            if item is _DONE:
+                return
+
+            symbol = item[0] if isinstance(item, tuple) else item
+            started = time.perf_counter()
+            try:
+                result = handler(item)
+            except Exception as e:
+                self._record(stage, failed=1, busy=time.perf_counter() - started, symbol=symbol)
+                record_error(stage, e)
+                logging.error(f"Pipeline {stage} stage failed for ticker {symbol}: {e}")
+                continue
+            self._record(stage, processed=1, busy=time.perf_counter() - started)
+
+            # Blocks while the next stage is saturated
+            out_queue.put(result)
+
+    def _write_batch(self, batch):
+        started = time.perf_counter()
+        try:
+            with pooled_connection() as conn:
+                write_table_rows(merge_table_rows(batch), conn)
+            self._record("load", processed=len(batch), busy=time.perf_counter() - started)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                self._record("load", failed=1, busy=time.perf_counter() - started, symbol=batch[0][0])
+                record_error("load", e)
+                logging.error(f"Pipeline load stage failed for ticker {batch[0][0]}: {e}")
+                return
+            logging.warning(f"Batch of {len(batch)} tickers failed to load, retrying one by one: {e}")
+
+        for item in batch:
+            self._write_batch([item])
+
+    def _run_loader(self, in_queue):
+        done = False
+        while not done:
+            item = in_queue.get()
+            if item is _DONE:
+                return
+
+            batch = [item]
+            while len(batch) < self.load_batch_size:
+                try:
+                    item = in_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+
+            self._write_batch(batch)
+
+    @staticmethod
+    def _start(count, name, target, *args):
+        threads = [
+            threading.Thread(target=target, args=args, name=f"{name}-{i}", daemon=True)
+            for i in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    @staticmethod
+    def _finish(threads, downstream_queue):
+        for _ in threads:
+            downstream_queue.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+    def run(self, symbols):
+        """
+        Push every symbol through the pipeline and return per-stage statistics
+        along with the symbols that failed in any stage.
+        """
+        self._failed_symbols = []
+        self._stats = {
+            stage: {"processed": 0, "failed": 0, "busy_time": 0.0, "workers": workers}
+            for stage, workers in (
+                ("fetch", self.fetch_workers),
+                ("transform", self.transform_workers),
+                ("load", self.load_workers),
+            )
+        }
+        fetch_queue = queue.Queue(maxsize=self.queue_size)
+        transform_queue = queue.Queue(maxsize=self.queue_size)
+        load_queue = queue.Queue(maxsize=self.queue_size)
+
+        started = time.perf_counter()
+        fetchers = self._start(self.fetch_workers, "fetch", self._run_stage,
+                               "fetch", self._fetch_item, fetch_queue, transform_queue)
+        transformers = self._start(self.transform_workers, "transform", self._run_stage,
+                                   "transform", transform_payloads, transform_queue, load_queue)
+        loaders = self._start(self.load_workers, "load", self._run_loader, load_queue)
+
+        for symbol in symbols:
+            fetch_queue.put(symbol)
+
+        # Shut the stages down in order so every queued item is drained
+        self._finish(fetchers, fetch_queue)
+        self._finish(transformers, transform_queue)
+        self._finish(loaders, load_queue)
+        elapsed = time.perf_counter() - started
+
+        for stage, stats in self._stats.items():
+            stats["throughput"] = stats["processed"] / elapsed if elapsed > 0 else 0.0
+            stats["utilization"] = stats["busy_time"] / (elapsed * stats["workers"]) if elapsed > 0 else 0.0
+            logging.info(
+                f"Pipeline {stage} stage: {stats['processed']} processed, {stats['failed']} failed, "
+                f"{stats['throughput']:.2f} tickers/s, {stats['utilization']:.0%} utilization "
+                f"across {stats['workers']} workers."
+            )
+        return {"elapsed": elapsed, "stages": self._stats, "failed_tickers": list(self._failed_symbols)}
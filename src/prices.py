@@ -0,0 +1,138 @@
+import os
+import time
+import logging
+import datetime
+from collections import defaultdict
+import yaml
+import pandas as pd
+from db_utils import bulk_insert_prices, fetch_latest_price_dates, fetch_ticker_id, pooled_connection, price_rows
+from quotes import checked_download
+from rate_limit import get_yahoo_rate_limiter
+from retry import RetryPolicy
+
+CONFIG_PATH = "config/config.yaml"
+
+HISTORY_RETRY_POLICY = RetryPolicy(max_attempts=3, base_delay=2.0, name="history")
+
+
+def load_config(path=CONFIG_PATH):
+    """
+    Load the YAML configuration file.
+    """
+    with open(path, "r") as config_file:
+        return yaml.safe_load(config_file) or {}
+
+def retention_start_year():
+    """
+    Return the first year kept in the 'prices' table under PRICE_RETENTION_YEARS,
+    or None if every year is kept.
+    """
+    retention_years = os.getenv("PRICE_RETENTION_YEARS")
+    if not retention_years:
+        return None
+    return datetime.date.today().year - int(retention_years) + 1
+
+def price_date_range(config=None):
+    """
+    Return the (start, end) dates of the price history to ingest, both inclusive,
+    from yfinance.start_date and yfinance.end_date in the configuration.
+    A missing end_date means today. The start never precedes the retention boundary,
+    since the partitions of older years are detached.
+    """
+    config = config if config is not None else load_config()
+    yfinance_config = config.get("yfinance", {})
+    start = pd.Timestamp(yfinance_config["start_date"]).date()
+    first_year = retention_start_year()
+    if first_year is not None:
+        start = max(start, datetime.date(first_year, 1, 1))
+    end_date = yfinance_config.get("end_date")
+    end = pd.Timestamp(end_date).date() if end_date else datetime.date.today()
+    if start > end:
+        raise ValueError(f"yfinance.start_date {start} is after yfinance.end_date {end}.")
+    return start, end
+
+def download_price_history(symbols, start, end):
+    """
+    Download daily OHLCV history from start to end (inclusive) for many BSE symbols
+    in one yfinance call, charging one token per symbol against the limiter's download
+    rate. Incremental ranges are often empty (e.g. over a weekend), so only symbols
+    Yahoo explicitly rate limited count as throttling. Returns {symbol: DataFrame}.
+    """
+    full_symbols = [f"{symbol}.BO" for symbol in symbols]
+    data = HISTORY_RETRY_POLICY.call(
+        get_yahoo_rate_limiter().call, checked_download, full_symbols,
+        tokens=len(full_symbols), download=True, empty_share=None,
+        start=start.isoformat(), end=(end + datetime.timedelta(days=1)).isoformat(),
+        interval="1d", group_by="ticker", auto_adjust=False, actions=False,
+        threads=True, progress=False,
+    )
+    if data is None or data.empty:
+        return {}
+    if not isinstance(data.columns, pd.MultiIndex):
+        return {symbols[0]: data}
+    available = set(data.columns.get_level_values(0))
+    return {
+        symbol: data[full_symbol]
+        for symbol, full_symbol in zip(symbols, full_symbols)
+        if full_symbol in available
+    }
+
+def plan_price_downloads(symbols, start, end, latest_dates):
+    """
+    Group symbols by the first date they still need, so each group can be fetched
+    with shared download parameters. Tickers that are already up to date are left out.
+    Returns {start date: [symbols]}.
+    """
+    groups = defaultdict(list)
+    for symbol in symbols:
+        ticker_id = fetch_ticker_id(symbol)
+        if ticker_id is None:
+            logging.warning(f"Skipping price history for unknown ticker '{symbol}'.")
+            continue
+        latest = latest_dates.get(ticker_id)
+        first_needed = max(start, latest + datetime.timedelta(days=1)) if latest else start
+        if first_needed <= end:
+            groups[first_needed].append(symbol)
+    return groups
+
+def ingest_price_history(symbols, batch_size=200, config=None):
+    """
+    Load daily OHLCV history for the configured date range into the 'prices' table.
+    Each ticker resumes from the day after its latest stored price. Tickers needing the
+    same start date are downloaded batch_size at a time with one multi-ticker request,
+    and every batch is bulk-loaded with COPY in its own transaction.
+    Returns the number of rows inserted.
+    """
+    started = time.perf_counter()
+    start, end = price_date_range(config)
+    groups = plan_price_downloads(symbols, start, end, fetch_latest_price_dates())
+    pending = sum(len(group) for group in groups.values())
+    logging.info(
+        f"Ingesting prices from {start} to {end} for {pending} of {len(symbols)} tickers "
+        f"in {len(groups)} date groups."
+    )
+
+    inserted = failed = 0
+    for first_needed, group in sorted(groups.items()):
+        for offset in range(0, len(group), batch_size):
+            batch = group[offset:offset + batch_size]
+            try:
+                histories = download_price_history(batch, first_needed, end)
+                rows = [
+                    row for symbol, history in histories.items()
+                    for row in price_rows(history, fetch_ticker_id(symbol))
+                ]
+                if rows:
+                    with pooled_connection() as conn:
+                        inserted += bulk_insert_prices(rows, conn)
+            except Exception as e:
+                failed += len(batch)
+                logging.error(f"Failed to ingest prices for {len(batch)} tickers starting at {batch[0]}: {e}")
+                continue
+            logging.info(f"Loaded {len(rows)} price rows for {len(batch)} tickers from {first_needed}.")
+
+    logging.info(
+        f"Inserted {inserted} price rows in {time.perf_counter() - started:.1f}s "
+        f"({failed} tickers failed)."
+    )
+    return inserted
@@ -0,0 +1,335 @@
+import os
+import gzip
+import time
+import pickle
+import random
+import logging
+import datetime
+import threading
+import pandas as pd
+import yfinance as yf
+from db_utils import (
+    BALANCE_SHEET_KEYS,
+    CASHFLOW_KEYS,
+    DATASETS,
+    DATED_DATASETS,
+    FAST_INFO_KEYS,
+    FINANCIAL_METRICS_KEYS,
+    RAW_PAYLOADS_KEY,
+    fetch_raw_payloads,
+    fetch_ticker_id,
+)
+from metrics import YFINANCE_CALL_SECONDS, timed_call
+from rate_limit import ThrottledError, get_yahoo_rate_limiter
+from response_cache import get_response_cache
+from retry import CircuitBreaker, RetryPolicy
+
+
+class DataProvider:
+    """
+    Source of the raw payloads stored for each ticker.
+    fetch(symbol, datasets) returns a dict with one entry per requested dataset,
+    all of DATASETS by default.
+    """
+
+    def fetch(self, symbol, datasets=DATASETS):
+        raise NotImplementedError
+
+
+def fetch_fast_info(yf_ticker):
+    """
+    Fetch every fast_info field, so the landed payload is complete; fast_info_row
+    picks out the FAST_INFO_KEYS we store. fast_info is evaluated lazily, so the
+    fields are materialized here rather than while a transaction is open.
+    """
+    fast_info = yf_ticker.get_fast_info()
+    return {key: fast_info.get(key) for key in fast_info.keys()}
+
+# yfinance call for each dataset stored per ticker
+DATASET_FETCHERS = {
+    "info": lambda yf_ticker: yf_ticker.get_info(),
+    "dividends": lambda yf_ticker: yf_ticker.dividends.to_dict(),
+    "balance_sheet": lambda yf_ticker: yf_ticker.get_balance_sheet(as_dict=True),
+    "fast_info": fetch_fast_info,
+    "cashflow": lambda yf_ticker: yf_ticker.get_cashflow(as_dict=True),
+}
+
+# Retry policy for each yfinance call type
+RETRY_POLICIES = {
+    "info": RetryPolicy(max_attempts=4, base_delay=1.0, name="info"),
+    "dividends": RetryPolicy(max_attempts=3, base_delay=1.0, name="dividends"),
+    "balance_sheet": RetryPolicy(max_attempts=3, base_delay=2.0, name="balance_sheet"),
+    "fast_info": RetryPolicy(max_attempts=2, base_delay=0.5, name="fast_info"),
+    "cashflow": RetryPolicy(max_attempts=3, base_delay=2.0, name="cashflow"),
+}
+
+# Stops requesting tickers that keep failing, e.g. delisted BSE codes that keep
+# returning empty payloads. Throttling says nothing about the ticker itself, so it does not count.
+# A fetch counts as one failure at most, however often it was retried.
+ticker_circuit_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("TICKER_CIRCUIT_FAILURE_THRESHOLD", 3)),
+    reset_timeout=float(os.getenv("TICKER_CIRCUIT_RESET_TIMEOUT", 3600)),
+    ignored_errors=(ThrottledError,),
+)
+
+def is_empty_info(info):
+    """
+    Yahoo answers info requests for delisted (and sometimes throttled) tickers with an
+    (almost) empty dictionary, e.g. {'trailingPegRatio': None}.
+    """
+    return not info or len(info) <= 1
+
+
+class YFinanceProvider(DataProvider):
+    """
+    Live Yahoo Finance provider for BSE tickers.
+    Fresh payloads are served from the on-disk response cache. Other requests go
+    through the shared rate limiter and the ticker's circuit breaker, and are
+    retried according to their RETRY_POLICIES entry. Every request to Yahoo is
+    timed in the ingest_yfinance_call_seconds histogram. With land_raw_payloads,
+    payloads fetched from Yahoo (not cache hits) are also attached under
+    RAW_PAYLOADS_KEY with their fetch time, and written to 'raw_payloads' along
+    with the ticker's other rows.
+    """
+
+    def __init__(self, land_raw_payloads=False):
+        self.land_raw_payloads = land_raw_payloads
+
+    def fetch(self, symbol, datasets=DATASETS):
+        limiter = get_yahoo_rate_limiter()
+        cache = get_response_cache()
+        yf_ticker = yf.Ticker(f"{symbol}.BO")
+
+        payloads = {}
+        raw_payloads = {}
+        for dataset in datasets:
+            fetch = DATASET_FETCHERS[dataset]
+            is_empty = is_empty_info if dataset == "info" else None
+
+            def fetch_dataset(fetch=fetch, dataset=dataset, is_empty=is_empty):
+                # The breaker wraps the retries, so a fetch counts as at most one failure
+                payload = ticker_circuit_breaker.call(
+                    symbol, RETRY_POLICIES[dataset].call, limiter.call,
+                    timed_call, YFINANCE_CALL_SECONDS.labels(dataset=dataset), "yfinance", fetch, yf_ticker,
+                    is_empty=is_empty,
+                )
+                if self.land_raw_payloads:
+                    raw_payloads[dataset] = (datetime.datetime.now(datetime.timezone.utc), payload)
+                return payload
+
+            if cache is not None:
+                payloads[dataset] = cache.get_or_fetch(symbol, dataset, fetch_dataset)
+            else:
+                payloads[dataset] = fetch_dataset()
+
+        if "info" in payloads:
+            # On a copy, so the landed raw payload keeps Yahoo's own symbol value
+            payloads["info"] = dict(payloads["info"], symbol=symbol)
+        if raw_payloads:
+            payloads[RAW_PAYLOADS_KEY] = raw_payloads
+        return payloads
+
+
+def payload_path(directory, symbol):
+    """
+    Path of the recorded payloads of a symbol.
+    """
+    return os.path.join(directory, f"{symbol.replace(os.sep, '_')}.pkl.gz")
+
+
+class RecordingProvider(DataProvider):
+    """
+    Wraps another provider and records every payload it returns to
+    <directory>/<symbol>.pkl.gz for later replay. Partial fetches are merged
+    into the symbol's existing recording.
+    """
+
+    def __init__(self, provider, directory):
+        self.provider = provider
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def fetch(self, symbol, datasets=DATASETS):
+        payloads = self.provider.fetch(symbol, datasets)
+        path = payload_path(self.directory, symbol)
+        recorded = {dataset: payload for dataset, payload in payloads.items() if dataset != RAW_PAYLOADS_KEY}
+        if set(recorded) != set(DATASETS) and os.path.exists(path):
+            with gzip.open(path, "rb") as record_file:
+                recorded = dict(pickle.load(record_file), **recorded)
+        with gzip.open(f"{path}.tmp", "wb") as record_file:
+            pickle.dump(recorded, record_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{path}.tmp", path)
+        return payloads
+
+
+class ReplayProvider(DataProvider):
+    """
+    Serves payloads recorded by RecordingProvider, sleeping latency seconds
+    (plus up to jitter seconds) per dataset to simulate network round trips.
+    """
+
+    def __init__(self, directory, latency=0.0, jitter=0.0):
+        self.directory = directory
+        self.latency = latency
+        self.jitter = jitter
+
+    def fetch(self, symbol, datasets=DATASETS):
+        path = payload_path(self.directory, symbol)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No recorded payloads for ticker '{symbol}' in {self.directory}.")
+        with gzip.open(path, "rb") as record_file:
+            payloads = pickle.load(record_file)
+        simulate_latency(self.latency, self.jitter, len(datasets))
+        return {dataset: payloads[dataset] for dataset in datasets}
+
+
+class LandingZoneProvider(DataProvider):
+    """
+    Serves the latest payloads landed in 'raw_payloads', so typed tables can be rebuilt
+    without any network access. To rebuild a table, empty it and 'ingestion_state'
+    first, since rows older than a ticker's watermark are otherwise skipped.
+    """
+
+    def fetch(self, symbol, datasets=DATASETS):
+        ticker_id = fetch_ticker_id(symbol)
+        if ticker_id is None:
+            raise ValueError(f"Ticker '{symbol}' not found.")
+        payloads = fetch_raw_payloads(ticker_id, datasets)
+        missing = [dataset for dataset in datasets if dataset not in payloads]
+        if missing:
+            raise LookupError(f"No landed {', '.join(missing)} payloads for ticker '{symbol}'.")
+
+        # Restore the timestamp keys that were stored as ISO strings
+        for dataset in DATED_DATASETS:
+            if dataset in payloads:
+                payloads[dataset] = {pd.Timestamp(date): data for date, data in payloads[dataset].items()}
+        return {dataset: payloads[dataset] for dataset in datasets}
+
+
+def simulate_latency(latency, jitter, requests):
+    """
+    Sleep as long as the given number of requests would take.
+    """
+    if latency or jitter:
+        time.sleep(sum(latency + random.uniform(0, jitter) for _ in range(requests)))
+
+
+def synthetic_symbols(count, prefix="SYN"):
+    """
+    Return count fake ticker symbols for use with SyntheticProvider.
+    """
+    return [f"{prefix}{i:05d}" for i in range(1, count + 1)]
+
+# Keys of the info payload that map to integer columns
+INTEGER_INFO_KEYS = {
+    "priceHint", "exDividendDate", "volume", "regularMarketVolume", "averageVolume",
+    "averageVolume10days", "marketCap", "enterpriseValue", "floatShares", "sharesOutstanding",
+    "impliedSharesOutstanding", "lastFiscalYearEnd", "nextFiscalYearEnd", "mostRecentQuarter",
+    "netIncomeToCommon", "lastSplitDate",
+}
+
+
+class SyntheticProvider(DataProvider):
+    """
+    Generates realistic-looking payloads for any symbol, deterministic per
+    (seed, symbol). Use with synthetic_symbols to benchmark at scale offline.
+    """
+
+    def __init__(self, seed=0, latency=0.0, jitter=0.0, report_periods=4, dividends=12):
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.report_periods = report_periods
+        self.dividends = dividends
+
+    def fetch(self, symbol, datasets=DATASETS):
+        rng = random.Random(f"{self.seed}:{symbol}")
+        simulate_latency(self.latency, self.jitter, len(datasets))
+
+        info = {key: rng.randint(1, 10 ** 9) if key in INTEGER_INFO_KEYS else round(rng.uniform(0, 1000), 4)
+                for key in FINANCIAL_METRICS_KEYS}
+        info.update({
+            "priceHint": 2,
+            "lastSplitFactor": "2:1",
+            "shortName": f"{symbol} Ltd",
+            "longName": f"{symbol} Limited",
+            "industry": "Synthetic",
+            "sector": "Synthetic",
+            "city": "Mumbai",
+            "country": "India",
+            "website": f"https://{symbol.lower()}.example.com",
+            "longBusinessSummary": f"Synthetic company {symbol}.",
+            "fullTimeEmployees": rng.randint(10, 100000),
+            "currency": "INR",
+            "exchange": "BSE",
+            "quoteType": "EQUITY",
+            "symbol": symbol,
+        })
+
+        # Offset dates per symbol so tickers do not share report or action dates
+        offset = datetime.timedelta(days=rng.randint(0, 27), seconds=rng.randint(0, 86399))
+        quarter_ends = [
+            datetime.datetime(2024, 3, 31) - datetime.timedelta(days=91 * i) - offset
+            for i in range(self.report_periods)
+        ]
+        statement = lambda keys: {
+            report_date: {key: round(rng.uniform(-1e9, 1e10), 2) for key in keys}
+            for report_date in quarter_ends
+        }
+
+        payloads = {
+            "info": info,
+            "dividends": {
+                datetime.datetime(2024, 1, 1) - datetime.timedelta(days=182 * i) - offset:
+                    round(rng.uniform(0.1, 50), 2)
+                for i in range(self.dividends)
+            },
+            "balance_sheet": statement(BALANCE_SHEET_KEYS),
+            "fast_info": {key: round(rng.uniform(1, 1e6), 4) for key in FAST_INFO_KEYS},
+            "cashflow": statement(CASHFLOW_KEYS),
+        }
+        return {dataset: payloads[dataset] for dataset in datasets}
+
+
+_data_provider = None
+_data_provider_lock = threading.Lock()
+
+def get_data_provider():
+    """
+    Return the process-wide data provider selected by DATA_PROVIDER:
+    'yfinance' (default), 'record' (yfinance, recorded to DATA_PROVIDER_DIR),
+    'replay' (from DATA_PROVIDER_DIR), 'synthetic' or 'landing' (the latest payloads
+    in the raw_payloads table). Replay and synthetic providers sleep
+    DATA_PROVIDER_LATENCY seconds per dataset. Payloads fetched from Yahoo are also
+    landed in raw_payloads unless RAW_PAYLOAD_LANDING is false.
+    """
+    global _data_provider
+    with _data_provider_lock:
+        if _data_provider is None:
+            kind = os.getenv("DATA_PROVIDER", "yfinance").lower()
+            directory = os.getenv("DATA_PROVIDER_DIR", "recordings")
+            latency = float(os.getenv("DATA_PROVIDER_LATENCY", 0))
+
+            landing = os.getenv("RAW_PAYLOAD_LANDING", "true").lower() in ("1", "true", "yes")
+            if kind == "yfinance":
+                _data_provider = YFinanceProvider(land_raw_payloads=landing)
+            elif kind == "record":
+                _data_provider = RecordingProvider(YFinanceProvider(land_raw_payloads=landing), directory)
+            elif kind == "replay":
+                _data_provider = ReplayProvider(directory, latency=latency)
+            elif kind == "synthetic":
+                _data_provider = SyntheticProvider(latency=latency)
+            elif kind == "landing":
+                _data_provider = LandingZoneProvider()
+            else:
+                raise ValueError(f"Unknown DATA_PROVIDER '{kind}'.")
+            logging.info(f"Using {type(_data_provider).__name__} for ticker payloads.")
+        return _data_provider
+
+def set_data_provider(provider):
+    """
+    Replace the process-wide data provider, e.g. with a replay provider for a benchmark.
+    """
+    global _data_provider
+    with _data_provider_lock:
+        _data_provider = provider
@@ -0,0 +1,174 @@
+import math
+import time
+import logging
+import pandas as pd
+import yfinance as yf
+from db_utils import bulk_update_tickers, execute_query, pooled_connection
+from rate_limit import ThrottledError, get_yahoo_rate_limiter, is_throttle_error
+from retry import RetryPolicy
+
+# Columns of the 'tickers' table refreshed from daily price history. 'shares' only
+# changes with corporate actions and is left to the full fast-info ingestion.
+QUOTE_COLUMNS = [
+    "day_high", "day_low", "fifty_day_average", "last_price", "last_volume", "market_cap",
+    "open", "previous_close", "regular_market_previous_close", "year_high", "year_low",
+    "ten_day_average_volume", "three_month_average_volume", "two_hundred_day_average",
+    "yearchange"
+]
+
+# Trading sessions in three months
+THREE_MONTH_SESSIONS = 63
+
+DOWNLOAD_RETRY_POLICY = RetryPolicy(max_attempts=3, base_delay=2.0, name="download")
+
+# Share of a multi-ticker download coming back without data that is taken as throttling
+THROTTLED_EMPTY_SHARE = 0.8
+
+
+def as_number(value):
+    """
+    Convert a pandas/NumPy scalar to a float, or None when it is missing.
+    """
+    if value is None:
+        return None
+    value = float(value)
+    return None if math.isnan(value) else value
+
+def quote_row(history, symbol, shares=None):
+    """
+    Derive the fast-info quote fields of one ticker from a year of daily OHLCV history,
+    the same way yfinance computes fast_info. Returns a row for
+    bulk_update_tickers(columns=QUOTE_COLUMNS), or None if there is no history.
+    """
+    history = history.dropna(subset=["Close"])
+    if history.empty:
+        return None
+
+    close, volume = history["Close"], history["Volume"]
+    last = history.iloc[-1]
+    last_price = as_number(last["Close"])
+    previous_close = as_number(close.iloc[-2]) if len(close) > 1 else None
+    quote = {
+        "day_high": as_number(last["High"]),
+        "day_low": as_number(last["Low"]),
+        "fifty_day_average": as_number(close.iloc[-50:].mean()),
+        "last_price": last_price,
+        "last_volume": as_number(last["Volume"]),
+        "market_cap": shares * last_price if shares and last_price is not None else None,
+        "open": as_number(last["Open"]),
+        "previous_close": previous_close,
+        "regular_market_previous_close": previous_close,
+        "year_high": as_number(history["High"].max()),
+        "year_low": as_number(history["Low"].min()),
+        "ten_day_average_volume": as_number(volume.iloc[-10:].mean()),
+        "three_month_average_volume": as_number(volume.iloc[-THREE_MONTH_SESSIONS:].mean()),
+        "two_hundred_day_average": as_number(close.iloc[-200:].mean()),
+        "yearchange": as_number(close.iloc[-1] / close.iloc[0] - 1),
+    }
+    return tuple(quote[column] for column in QUOTE_COLUMNS) + (symbol,)
+
+def empty_symbols(data, full_symbols):
+    """
+    Return the symbols of a yf.download result that have no closing prices at all.
+    """
+    if data is None or data.empty:
+        return list(full_symbols)
+    if not isinstance(data.columns, pd.MultiIndex):
+        return [] if data["Close"].notna().any() else list(full_symbols)
+    available = set(data.columns.get_level_values(0))
+    return [
+        symbol for symbol in full_symbols
+        if symbol not in available or not data[symbol]["Close"].notna().any()
+    ]
+
+def checked_download(full_symbols, empty_share=THROTTLED_EMPTY_SHARE, **kwargs):
+    """
+    Call yf.download for many symbols and return its DataFrame.
+    yf.download does not raise on per-symbol failures: it records them in
+    yf.shared._ERRORS and returns NaN columns. ThrottledError is raised instead if any
+    symbol was rate limited, or if more than empty_share of the batch came back empty
+    (None disables this check), so the retry policy and the limiter's AIMD limit can react.
+    """
+    data = yf.download(full_symbols, **kwargs)
+    errors = getattr(getattr(yf, "shared", None), "_ERRORS", None) or {}
+    throttled = [symbol for symbol in full_symbols if symbol in errors and is_throttle_error(errors[symbol])]
+    if throttled:
+        raise ThrottledError(f"Yahoo Finance rate limited {len(throttled)} of {len(full_symbols)} symbols.")
+    if empty_share is None:
+        return data
+    empty = empty_symbols(data, full_symbols)
+    if len(full_symbols) > 1 and len(empty) > empty_share * len(full_symbols):
+        raise ThrottledError(f"{len(empty)} of {len(full_symbols)} symbols came back without data.")
+    return data
+
+def download_history(symbols):
+    """
+    Download a year of daily history for many BSE symbols in one yfinance call,
+    charging one token per symbol against the limiter's download rate.
+    Returns {symbol: DataFrame with Open/High/Low/Close/Volume columns}.
+    """
+    full_symbols = [f"{symbol}.BO" for symbol in symbols]
+    data = DOWNLOAD_RETRY_POLICY.call(
+        get_yahoo_rate_limiter().call, checked_download, full_symbols, tokens=len(full_symbols), download=True,
+        period="1y", interval="1d", group_by="ticker", auto_adjust=False,
+        actions=False, threads=True, progress=False,
+    )
+    if data is None or data.empty:
+        return {}
+    if not isinstance(data.columns, pd.MultiIndex):
+        return {symbols[0]: data}
+    available = set(data.columns.get_level_values(0))
+    return {
+        symbol: data[full_symbol]
+        for symbol, full_symbol in zip(symbols, full_symbols)
+        if full_symbol in available
+    }
+
+def fetch_shares(connection=None):
+    """
+    Return {symbol: shares outstanding} for tickers with a known share count.
+    """
+    rows = execute_query(
+        "SELECT ticker, shares FROM tickers WHERE shares IS NOT NULL", fetch_all=True, connection=connection
+    ) or []
+    return {ticker: float(shares) for ticker, shares in rows}
+
+def refresh_quotes(symbols, batch_size=500):
+    """
+    Refresh the quote columns of the 'tickers' table for many symbols.
+    Each batch of batch_size symbols is fetched with one multi-ticker download and
+    written with one UPDATE ... FROM (VALUES ...). Batches run one after another since
+    yf.download already parallelizes within a batch and is not safe to run concurrently.
+    Returns the number of tickers updated.
+    """
+    started = time.perf_counter()
+    shares = fetch_shares()
+    updated = missing = 0
+
+    for start in range(0, len(symbols), batch_size):
+        batch = symbols[start:start + batch_size]
+        try:
+            histories = download_history(batch)
+        except Exception as e:
+            logging.error(f"Failed to download quotes for {len(batch)} tickers starting at {batch[0]}: {e}")
+            missing += len(batch)
+            continue
+
+        rows = [
+            row for row in (
+                quote_row(histories[symbol], symbol, shares.get(symbol))
+                for symbol in batch if symbol in histories
+            )
+            if row is not None
+        ]
+        missing += len(batch) - len(rows)
+        if rows:
+            with pooled_connection() as conn:
+                bulk_update_tickers(rows, conn, columns=QUOTE_COLUMNS)
+            updated += len(rows)
+        logging.info(f"Refreshed quotes for {updated} tickers so far ({missing} without data).")
+
+    logging.info(
+        f"Refreshed quotes for {updated} of {len(symbols)} tickers in {time.perf_counter() - started:.1f}s."
+    )
+    return updated
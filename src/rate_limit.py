@@ -0,0 +1,200 @@
+import os
+import time
+import logging
+import threading
+
+
+class ThrottledError(Exception):
+    """
+    Raised when Yahoo Finance throttles a request (HTTP 429 / YFRateLimitError).
+    """
+
+
+class EmptyPayloadError(Exception):
+    """
+    Raised when Yahoo Finance returns an (almost) empty payload. Yahoo does this when it
+    throttles, so the concurrency limit backs off as for ThrottledError, but a ticker
+    that keeps returning nothing is usually delisted, so unlike ThrottledError it also
+    counts against the ticker's circuit breaker.
+    """
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing rate requests per second with bursts of up to burst requests.
+    """
+
+    def __init__(self, rate, burst):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1.")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens one at a time, sleeping until each is available. More tokens than
+        burst can be taken; they are then spread over the refill rate.
+        """
+        for _ in range(tokens):
+            self._acquire_one()
+
+    def _acquire_one(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limit that adapts AIMD-style: every successful request raises the limit
+    by increase / limit (about +increase per round of requests), and every throttled
+    request multiplies it by decrease, within [min_limit, max_limit].
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=32, increase=1.0, decrease=0.5):
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial <= max_limit.")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def acquire(self):
+        """
+        Wait for a free slot under the current limit.
+        """
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, throttled=False, succeeded=True):
+        """
+        Free a slot and adapt the limit to the outcome of the request.
+        Requests that failed for reasons other than throttling leave the limit unchanged.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self._limit = max(self.min_limit, self._limit * self.decrease)
+            elif succeeded:
+                self._limit = min(self.max_limit, self._limit + self.increase / self._limit)
+            self._cond.notify_all()
+
+
+def is_throttle_error(error):
+    """
+    Return True if an exception raised by yfinance, or an error message it recorded,
+    signals rate limiting.
+    """
+    message = str(error)
+    return (
+        isinstance(error, ThrottledError)
+        or type(error).__name__ == "YFRateLimitError"
+        or "429" in message
+        or "Too Many Requests" in message
+        or "Rate limited" in message
+    )
+
+
+class RateLimiter:
+    """
+    Shared gate for Yahoo Finance requests: a token bucket caps the request rate and
+    an AIMD limiter caps, and adapts, the number of concurrent requests. Multi-ticker
+    downloads draw from a separate bucket metered in symbols, since Yahoo serves a
+    batch far more cheaply than one request per symbol.
+    """
+
+    def __init__(self, rate=5.0, burst=10, initial_concurrency=4, min_concurrency=1, max_concurrency=32,
+                 download_rate=100.0, download_burst=500):
+        self.bucket = TokenBucket(rate, burst)
+        self.download_bucket = TokenBucket(download_rate, download_burst)
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            initial=initial_concurrency, min_limit=min_concurrency, max_limit=max_concurrency
+        )
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "throttled": 0, "empty": 0}
+
+    def call(self, fn, *args, is_empty=None, tokens=1, download=False, **kwargs):
+        """
+        Call fn under the rate and concurrency limits, charging tokens against the request
+        rate, or against the download rate with download=True (one token per symbol of a
+        multi-ticker download).
+        Raises ThrottledError if the call was throttled, and EmptyPayloadError if
+        is_empty(result) is true.
+        """
+        self.concurrency.acquire()
+        throttled = succeeded = empty = False
+        try:
+            (self.download_bucket if download else self.bucket).acquire(tokens)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if is_throttle_error(e):
+                    throttled = True
+                    raise ThrottledError(f"Yahoo Finance throttled the request: {e}") from e
+                raise
+            if is_empty is not None and is_empty(result):
+                throttled = empty = True
+                raise EmptyPayloadError("Yahoo Finance returned an empty payload.")
+            succeeded = True
+            return result
+        finally:
+            self.concurrency.release(throttled=throttled, succeeded=succeeded)
+            with self._lock:
+                self._stats["requests"] += 1
+                self._stats["throttled"] += int(throttled)
+                self._stats["empty"] += int(empty)
+            if throttled:
+                logging.warning(f"Yahoo Finance throttled a request; concurrency limit is now {self.concurrency.limit}.")
+
+    def stats(self):
+        """
+        Return a snapshot of limiter statistics.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["concurrency_limit"] = self.concurrency.limit
+        return stats
+
+
+_yahoo_rate_limiter = None
+_yahoo_rate_limiter_lock = threading.Lock()
+
+def get_yahoo_rate_limiter():
+    """
+    Return the process-wide Yahoo Finance rate limiter, creating it on first use.
+    Configured by YAHOO_RATE (requests/second), YAHOO_BURST, YAHOO_INITIAL_CONCURRENCY,
+    YAHOO_MIN_CONCURRENCY, YAHOO_MAX_CONCURRENCY, and YAHOO_DOWNLOAD_RATE
+    (symbols/second for multi-ticker downloads) with YAHOO_DOWNLOAD_BURST.
+    """
+    global _yahoo_rate_limiter
+    with _yahoo_rate_limiter_lock:
+        if _yahoo_rate_limiter is None:
+            _yahoo_rate_limiter = RateLimiter(
+                rate=float(os.getenv("YAHOO_RATE", 5)),
+                burst=int(os.getenv("YAHOO_BURST", 10)),
+                initial_concurrency=int(os.getenv("YAHOO_INITIAL_CONCURRENCY", 4)),
+                min_concurrency=int(os.getenv("YAHOO_MIN_CONCURRENCY", 1)),
+                max_concurrency=int(os.getenv("YAHOO_MAX_CONCURRENCY", 32)),
+                download_rate=float(os.getenv("YAHOO_DOWNLOAD_RATE", 100)),
+                download_burst=int(os.getenv("YAHOO_DOWNLOAD_BURST", 500)),
+            )
+        return _yahoo_rate_limiter
@@ -0,0 +1,187 @@
+import os
+import time
+import pickle
+import logging
+import tempfile
+import threading
+
+# Seconds a cached payload stays fresh, per dataset
+DEFAULT_TTLS = {
+    "fast_info": 15 * 60,
+    "info": 12 * 60 * 60,
+    "dividends": 24 * 60 * 60,
+    "balance_sheet": 7 * 24 * 60 * 60,
+    "cashflow": 7 * 24 * 60 * 60,
+}
+
+
+class ResponseCache:
+    """
+    On-disk cache of yfinance payloads keyed by symbol and dataset.
+
+    Each payload is pickled to <directory>/<dataset>/<symbol>.pkl. An entry is served
+    while it is younger than the TTL of its dataset. Once the cache grows past
+    max_bytes, the least recently used entries are evicted.
+    """
+
+    def __init__(self, directory, ttls=None, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._size = 0
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        self._load_index()
+
+    def _load_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".pkl"):
+                    continue
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                self._entries[path] = [stat.st_size, stat.st_atime]
+                self._size += stat.st_size
+
+    def _path(self, symbol, dataset):
+        return os.path.join(self.directory, dataset, f"{symbol.replace(os.sep, '_')}.pkl")
+
+    def get(self, symbol, dataset):
+        """
+        Return (True, payload) for a fresh cached entry and (False, None) otherwise.
+        """
+        path = self._path(symbol, dataset)
+        try:
+            written = os.path.getmtime(path)
+        except OSError:
+            with self._lock:
+                self._stats["misses"] += 1
+            return False, None
+
+        if time.time() - written > self.ttls.get(dataset, 0):
+            with self._lock:
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+            return False, None
+
+        try:
+            with open(path, "rb") as cache_file:
+                payload = pickle.load(cache_file)
+        except Exception as e:
+            logging.warning(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            with self._lock:
+                self._stats["misses"] += 1
+            return False, None
+
+        now = time.time()
+        # Keep mtime as the write time for the TTL and use atime for LRU ordering
+        os.utime(path, (now, written))
+        with self._lock:
+            self._stats["hits"] += 1
+            if path in self._entries:
+                self._entries[path][1] = now
+        return True, payload
+
+    def put(self, symbol, dataset, payload):
+        """
+        Store a payload, evicting least recently used entries if the cache is over size.
+        """
+        path = self._path(symbol, dataset)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as cache_file:
+                pickle.dump(payload, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+        size = os.path.getsize(path)
+        with self._lock:
+            previous = self._entries.get(path)
+            if previous:
+                self._size -= previous[0]
+            self._entries[path] = [size, time.time()]
+            self._size += size
+            evict = self._select_evictions()
+        for evicted in evict:
+            self._remove(evicted, evicted=True)
+
+    def _select_evictions(self):
+        if self._size <= self.max_bytes:
+            return []
+        evict, size = [], self._size
+        for path, (entry_size, _) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if size <= self.max_bytes:
+                break
+            evict.append(path)
+            size -= entry_size
+        return evict
+
+    def _remove(self, path, evicted=False):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry:
+                self._size -= entry[0]
+            if evicted:
+                self._stats["evictions"] += 1
+
+    def get_or_fetch(self, symbol, dataset, fetch):
+        """
+        Return the cached payload if fresh, otherwise call fetch() and cache its result.
+        """
+        hit, payload = self.get(symbol, dataset)
+        if hit:
+            return payload
+        payload = fetch()
+        try:
+            self.put(symbol, dataset, payload)
+        except Exception as e:
+            logging.warning(f"Failed to cache {dataset} for {symbol}: {e}")
+        return payload
+
+    def stats(self):
+        """
+        Return a snapshot of cache statistics.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._size
+        return stats
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """
+    Return the process-wide response cache, or None when YF_CACHE_ENABLED is false.
+    Stored under YF_CACHE_DIR (default .cache/yfinance) and bounded by YF_CACHE_MAX_MB.
+    Per-dataset TTLs in seconds can be overridden with YF_CACHE_TTL_<DATASET>,
+    e.g. YF_CACHE_TTL_FAST_INFO=300.
+    """
+    global _response_cache
+    if os.getenv("YF_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            ttls = {
+                dataset: float(os.getenv(f"YF_CACHE_TTL_{dataset.upper()}", ttl))
+                for dataset, ttl in DEFAULT_TTLS.items()
+            }
+            _response_cache = ResponseCache(
+                os.getenv("YF_CACHE_DIR", ".cache/yfinance"),
+                ttls=ttls,
+                max_bytes=int(float(os.getenv("YF_CACHE_MAX_MB", 512)) * 1024 * 1024),
+            )
+        return _response_cache
@@ -0,0 +1,124 @@
+import time
+import random
+import logging
+import threading
+import requests
+from metrics import RETRIES
+from rate_limit import EmptyPayloadError, ThrottledError
+
+# Errors worth retrying by default: throttling, empty payloads and transient network failures
+DEFAULT_RETRYABLE = (ThrottledError, EmptyPayloadError, ConnectionError, TimeoutError, requests.RequestException)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a call is skipped because the circuit for its key is open.
+    """
+
+
+class RetryPolicy:
+    """
+    Retry a call up to max_attempts times on retryable errors, sleeping for an
+    exponentially growing delay with full jitter between attempts.
+    Retries are counted in the ingest_retries_total metric under the policy's name.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=1.0, max_delay=30.0, retryable=DEFAULT_RETRYABLE, name="default"):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1.")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable
+        self.name = name
+
+    def delay(self, attempt):
+        """
+        Return the sleep before the retry following the given (1-based) attempt.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Call fn, retrying retryable errors. The last error is re-raised once attempts run out.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return fn(*args, **kwargs)
+            except self.retryable as e:
+                if attempt == self.max_attempts:
+                    raise
+                delay = self.delay(attempt)
+                RETRIES.labels(policy=self.name).inc()
+                logging.warning(
+                    f"Attempt {attempt}/{self.max_attempts} failed: {e}. Retrying in {delay:.1f}s."
+                )
+                time.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Per-key circuit breaker. After failure_threshold consecutive failures the circuit
+    for a key opens and calls for it fail fast with CircuitOpenError until
+    reset_timeout seconds have passed; the next call then probes the key again.
+    Errors listed in ignored_errors are not held against the key.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=600.0, ignored_errors=()):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.ignored_errors = ignored_errors
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._opened_at = {}
+
+    def is_open(self, key):
+        """
+        Return True if calls for key are currently being skipped.
+        """
+        with self._lock:
+            opened_at = self._opened_at.get(key)
+            if opened_at is None:
+                return False
+            if time.monotonic() - opened_at >= self.reset_timeout:
+                # Half-open: let the next call through, one more failure re-opens it
+                del self._opened_at[key]
+                self._failures[key] = self.failure_threshold - 1
+                return False
+            return True
+
+    def record_success(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+            self._opened_at.pop(key, None)
+
+    def record_failure(self, key):
+        with self._lock:
+            failures = self._failures.get(key, 0) + 1
+            self._failures[key] = failures
+            if failures >= self.failure_threshold and key not in self._opened_at:
+                self._opened_at[key] = time.monotonic()
+                logging.warning(f"Circuit opened for {key} after {failures} consecutive failures.")
+
+    def call(self, key, fn, *args, **kwargs):
+        """
+        Call fn unless the circuit for key is open, recording the outcome.
+        """
+        if self.is_open(key):
+            raise CircuitOpenError(f"Circuit is open for {key}.")
+        try:
+            result = fn(*args, **kwargs)
+        except self.ignored_errors:
+            raise
+        except Exception:
+            self.record_failure(key)
+            raise
+        self.record_success(key)
+        return result
+
+    def open_keys(self):
+        """
+        Return the keys whose circuit is currently open.
+        """
+        with self._lock:
+            return list(self._opened_at)
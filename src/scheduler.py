@@ -1,19 +1,33 @@
 from db_utils import (
+    close_connection_pool,
     fetch_all_tickers, 
-    insert_balance_sheet, 
-    create_tables, 
-    insert_company_data, 
-    insert_dividend_data, 
-    insert_industry_data, 
-    insert_sector_data, 
-    insert_tickers_data, 
-    update_tickers_data,
-    insert_cashflow,
-    insert_financial_metrics
+    fetch_ingestion_state,
+    fetch_ticker_id,
+    ensure_reference_data,
+    ensure_schema,
+    insert_ticker_payloads,
+    detach_price_partitions,
+    load_ingestion_state,
+    load_ticker_id_cache
 )
+from async_ingest import ingest_tickers_async
+from export import export_fundamentals
+from fundamentals_store import build_fundamentals_store
+from metrics import TICKERS_IN_FLIGHT, TICKERS_PROCESSED, record_error, start_metrics_server, write_metrics_textfile
+from pipeline import IngestPipeline
+from providers import DATASETS, get_data_provider, ticker_circuit_breaker
+from prices import ingest_price_history, retention_start_year
+from quotes import refresh_quotes
+from rate_limit import get_yahoo_rate_limiter
+from response_cache import get_response_cache
+from write_buffer import TickerWriteBuffers
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-import yfinance as yf
+import asyncio
+import datetime
 import logging
+import os
+import time
 
 # Load environment variables
 load_dotenv()
@@ -21,64 +35,346 @@ load_dotenv()
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def process_ticker_data(ticker_data):
+DEFAULT_MAX_WORKERS = 8
+
+# Seconds after a successful fetch before a dataset is fetched again in incremental runs
+DATASET_REFRESH_INTERVALS = {
+    "fast_info": 12 * 60 * 60,
+    "info": 7 * 24 * 60 * 60,
+    "dividends": 7 * 24 * 60 * 60,
+    "balance_sheet": 30 * 24 * 60 * 60,
+    "cashflow": 30 * 24 * 60 * 60,
+}
+
+
+def stale_datasets(symbol):
+    """
+    Return the datasets of a ticker that are due for a fetch. With INGEST_INCREMENTAL
+    (the default) a dataset is skipped until DATASET_REFRESH_INTERVALS has passed since
+    its last successful fetch; intervals can be overridden with INGEST_REFRESH_<DATASET>,
+    e.g. INGEST_REFRESH_FAST_INFO=3600.
+    """
+    if not env_flag("INGEST_INCREMENTAL", "true"):
+        return list(DATASETS)
+    ticker_id = fetch_ticker_id(symbol)
+    state = fetch_ingestion_state(ticker_id) if ticker_id is not None else {}
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        dataset for dataset in DATASETS
+        if dataset not in state
+        or (now - state[dataset][0]).total_seconds()
+        >= float(os.getenv(f"INGEST_REFRESH_{dataset.upper()}", DATASET_REFRESH_INTERVALS[dataset]))
+    ]
+
+def fetch_ticker_payloads(symbol):
+    """
+    Fetch the stale datasets of a single ticker from the configured data provider
+    (see providers.get_data_provider). All network access happens here, before
+    any database connection is checked out.
+    """
+    datasets = stale_datasets(symbol)
+    if not datasets:
+        return {}
+    return get_data_provider().fetch(symbol, datasets)
+
+def process_ticker_data(ticker_data, buffers=None):
     """
     Process and insert data for a single ticker.
+    All datasets are fetched first and then written in one transaction, or queued
+    on the write-behind buffers when they are given.
+    Returns True on success and False if any step failed; errors are logged
+    and never raised so one bad ticker cannot stop the rest of the run.
     """
-    symbol = ticker_data[1]  # Assuming ticker_data is a tuple with symbol at index 1
-    full_symbol = f"{symbol}.BO"
-    logging.info(f"Processing ticker: {full_symbol}")
+    symbol = ticker_data[1]  # ticker_data is an (id, ticker) pair from fetch_all_tickers
+    logging.info(f"Processing ticker: {symbol}.BO")
 
+    TICKERS_IN_FLIGHT.inc()
     try:
-        yf_ticker = yf.Ticker(full_symbol)
+        payloads = fetch_ticker_payloads(symbol)
+        if not payloads:
+            logging.info(f"Skipping ticker {symbol}: every dataset is up to date.")
+            TICKERS_PROCESSED.labels(outcome="skipped").inc()
+            return True
+        if buffers is not None:
+            buffers.add_ticker(symbol, payloads)
+        else:
+            insert_ticker_payloads(symbol, payloads)
+        TICKERS_PROCESSED.labels(outcome="succeeded").inc()
+        return True
+
+    except Exception as e:
+        logging.error(f"Failed to process ticker {symbol}: {e}")
+        record_error("ticker", e)
+        TICKERS_PROCESSED.labels(outcome="failed").inc()
+        return False
 
-        # # Fetch and insert company data
-        info = yf_ticker.get_info()
-        info["symbol"] = symbol
-        insert_company_data(info)
-        insert_financial_metrics(info, symbol)
+    finally:
+        TICKERS_IN_FLIGHT.dec()
 
-        # # Fetch and insert dividend data
-        dividends = yf_ticker.dividends.to_dict()
-        insert_dividend_data(dividends, symbol)
+def get_max_workers(max_workers=None):
+    """
+    Resolve the worker count from the argument or the INGEST_MAX_WORKERS environment variable.
+    """
+    if max_workers is None:
+        max_workers = int(os.getenv("INGEST_MAX_WORKERS", DEFAULT_MAX_WORKERS))
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1.")
+    return max_workers
 
-        # # # Fetch and insert balance sheet data
-        balance_sheet = yf_ticker.get_balance_sheet(as_dict=True)
-        insert_balance_sheet(balance_sheet, symbol)
+def get_write_buffers(write_behind=None):
+    """
+    Create write-behind buffers if enabled by the argument or the INGEST_WRITE_BEHIND
+    environment variable, sized by WRITE_BUFFER_MAX_ROWS and WRITE_BUFFER_MAX_AGE.
+    """
+    if write_behind is None:
+        write_behind = env_flag("INGEST_WRITE_BEHIND")
+    if not write_behind:
+        return None
+    return TickerWriteBuffers(
+        max_rows=int(os.getenv("WRITE_BUFFER_MAX_ROWS", 5000)),
+        max_age=float(os.getenv("WRITE_BUFFER_MAX_AGE", 30)),
+    )
 
-        # # Fetch and update ticker fast info
-        fast_info = yf_ticker.get_fast_info()
-        update_tickers_data(fast_info, symbol)
-        
-        cashflow = yf_ticker.get_cashflow(as_dict=True)
-        insert_cashflow(cashflow, symbol)
+def env_flag(name, default="false"):
+    """
+    Read a boolean environment variable.
+    """
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
 
-    except Exception as e:
-        logging.error(f"Failed to process ticker {symbol}: {e}")
+def process_tickers_pipelined(tickers):
+    """
+    Run all tickers through the staged fetch/transform/load pipeline, configured by the
+    PIPELINE_FETCH_WORKERS, PIPELINE_TRANSFORM_WORKERS, PIPELINE_LOAD_WORKERS,
+    PIPELINE_QUEUE_SIZE and PIPELINE_LOAD_BATCH_SIZE environment variables.
+    Returns the number of tickers that succeeded and the symbols that failed.
+    """
+    pipeline = IngestPipeline(
+        fetch_ticker_payloads,
+        fetch_workers=int(os.getenv("PIPELINE_FETCH_WORKERS", DEFAULT_MAX_WORKERS)),
+        transform_workers=int(os.getenv("PIPELINE_TRANSFORM_WORKERS", 2)),
+        load_workers=int(os.getenv("PIPELINE_LOAD_WORKERS", 2)),
+        queue_size=int(os.getenv("PIPELINE_QUEUE_SIZE", 100)),
+        load_batch_size=int(os.getenv("PIPELINE_LOAD_BATCH_SIZE", 50)),
+    )
+    result = pipeline.run(ticker_data[1] for ticker_data in tickers)
+    return result["stages"]["load"]["processed"], result["failed_tickers"]
+
+def collect_flush_failures(buffers, succeeded, failed):
+    """
+    Flush the write-behind buffers and move the tickers whose rows were lost to a failed
+    flush from succeeded to failed, so the end-of-run requeue retries them.
+    Returns the updated number of tickers that succeeded and the symbols that failed.
+    """
+    buffers.flush()
+    lost = buffers.take_failed_symbols() - set(failed)
+    if lost:
+        logging.warning(f"Rows of {len(lost)} tickers were lost to a failed flush; marking them as failed.")
+        TICKERS_PROCESSED.labels(outcome="failed").inc(len(lost))
+    return succeeded - len(lost), list(failed) + sorted(lost)
+
+def process_tickers_concurrently(tickers, max_workers, buffers=None):
+    """
+    Run process_ticker_data for every ticker on a bounded thread pool. With write-behind
+    buffers, they are flushed before returning and tickers whose rows could not be
+    written count as failed.
+    Returns the number of tickers that succeeded and the symbols that failed.
+    """
+    succeeded, failed = 0, []
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest") as executor:
+        futures = {
+            executor.submit(process_ticker_data, ticker_data, buffers): ticker_data[1]
+            for ticker_data in tickers
+        }
+        for future in as_completed(futures):
+            if future.result():
+                succeeded += 1
+            else:
+                failed.append(futures[future])
+    if buffers is not None:
+        succeeded, failed = collect_flush_failures(buffers, succeeded, failed)
+    return succeeded, failed
+
+def requeue_failed_tickers(tickers, failed_symbols):
+    """
+    Select the failed tickers worth retrying at the end of the run,
+    leaving out those whose circuit breaker is open.
+    """
+    failed_symbols = set(failed_symbols)
+    requeue = [
+        ticker_data for ticker_data in tickers
+        if ticker_data[1] in failed_symbols and not ticker_circuit_breaker.is_open(ticker_data[1])
+    ]
+    if failed_symbols:
+        logging.info(
+            f"Requeueing {len(requeue)} of {len(failed_symbols)} failed tickers; "
+            f"{len(failed_symbols) - len(requeue)} skipped by the circuit breaker."
+        )
+    return requeue
+
+def run_with_requeue(tickers, run):
+    """
+    Run tickers through run(tickers) -> (succeeded, failed_symbols), then retry the
+    failed ones once more. Returns the number of tickers that succeeded and failed.
+    """
+    succeeded, failed_symbols = run(tickers)
+    requeue = requeue_failed_tickers(tickers, failed_symbols)
+    if requeue:
+        retried, _ = run(requeue)
+        succeeded += retried
+    return succeeded, len(tickers) - succeeded
+
+def log_run_summary(total, succeeded, failed, elapsed, max_workers):
+    """
+    Log wall-clock time and per-ticker throughput for an ingestion run.
+    """
+    logging.info(f"Yahoo Finance rate limiter statistics: {get_yahoo_rate_limiter().stats()}")
+    if get_response_cache() is not None:
+        logging.info(f"Response cache statistics: {get_response_cache().stats()}")
+    throughput = total / elapsed if elapsed > 0 else 0.0
+    per_ticker = elapsed / total if total else 0.0
+    logging.info(
+        f"Processed {total} tickers ({succeeded} succeeded, {failed} failed) "
+        f"with {max_workers} workers in {elapsed:.1f}s: "
+        f"{throughput:.2f} tickers/s, {per_ticker:.3f}s per ticker."
+    )
+
+def publish_read_stores(run_started):
+    """
+    Refresh the read-side copies of the fundamentals after an ingestion run: the Parquet
+    export of the tickers touched since run_started and the memory-mapped fundamentals
+    store. Both are on by default; EXPORT_PARQUET=false and FUNDAMENTALS_STORE=false
+    turn them off. Failures are logged and do not fail the ingestion.
+    """
+    if env_flag("EXPORT_PARQUET", "true"):
+        try:
+            export_fundamentals(since=run_started)
+        except Exception as e:
+            logging.error(f"Failed to export fundamentals to Parquet: {e}")
+    if env_flag("FUNDAMENTALS_STORE", "true"):
+        try:
+            build_fundamentals_store()
+        except Exception as e:
+            logging.error(f"Failed to rebuild the fundamentals store: {e}")
+
+def ticker_filters():
+    """
+    Read the optional ticker selection for a run: INGEST_SYMBOLS (comma-separated symbols),
+    INGEST_SECTOR_ID and INGEST_STALE_AFTER (seconds since a ticker was last ingested).
+    """
+    filters = {}
+    if os.getenv("INGEST_SYMBOLS"):
+        filters["symbols"] = [symbol.strip() for symbol in os.getenv("INGEST_SYMBOLS").split(",") if symbol.strip()]
+    if os.getenv("INGEST_SECTOR_ID"):
+        filters["sector_id"] = int(os.getenv("INGEST_SECTOR_ID"))
+    if os.getenv("INGEST_STALE_AFTER"):
+        filters["stale_after"] = float(os.getenv("INGEST_STALE_AFTER"))
+    return filters
 
-def schedule_ingest_data():
+def prepare_ingest():
+    """
+    Set up the database tables and reference data, then return the (id, ticker) pairs
+    of the tickers to ingest, narrowed down by ticker_filters. Both setup steps are
+    skipped when ddl.sql and Equity.csv are unchanged since they were last applied.
+    """
+    # Database setup and initial data insertion
+    logging.info("Setting up database tables and inserting initial data...")
+    ensure_schema()
+    ensure_reference_data()
+    load_ingestion_state()
+
+    # Fetch all tickers from the database
+    logging.info("Fetching all tickers from the database...")
+    tickers = fetch_all_tickers(**ticker_filters())
+
+    if not tickers:
+        logging.warning("No tickers found in the database. Exiting data ingestion.")
+    return tickers
+
+def schedule_ingest_data(max_workers=None, write_behind=None, pipelined=None):
     """
     Schedules the ingestion of data from Yahoo Finance for all tickers in the database.
+    Tickers are processed in parallel by max_workers threads (INGEST_MAX_WORKERS,
+    default 8); pass max_workers=1 to process them sequentially. With write_behind
+    (INGEST_WRITE_BEHIND) rows from many tickers are buffered and written in large batches.
+    With pipelined (INGEST_PIPELINE) tickers instead flow through separate fetch,
+    transform and load stages, each with its own worker count.
+    Afterwards the read-side stores are refreshed, see publish_read_stores.
     """
     try:
-        # Database setup and initial data insertion
-        logging.info("Setting up database tables and inserting initial data...")
-        create_tables()
-        insert_industry_data()
-        insert_sector_data()
-        insert_tickers_data()
+        start_metrics_server()
+        run_started = datetime.datetime.now(datetime.timezone.utc)
+        tickers = prepare_ingest()
+        if not tickers:
+            return
+
+        if pipelined is None:
+            pipelined = env_flag("INGEST_PIPELINE")
+
+        started = time.perf_counter()
+        if pipelined:
+            max_workers = int(os.getenv("PIPELINE_FETCH_WORKERS", DEFAULT_MAX_WORKERS))
+            logging.info(f"Processing {len(tickers)} tickers through the staged pipeline...")
+            succeeded, failed = run_with_requeue(tickers, process_tickers_pipelined)
+        else:
+            max_workers = get_max_workers(max_workers)
+            buffers = get_write_buffers(write_behind)
+            logging.info(f"Processing {len(tickers)} tickers with {max_workers} workers...")
+            succeeded, failed = run_with_requeue(
+                tickers, lambda batch: process_tickers_concurrently(batch, max_workers, buffers)
+            )
+            if buffers is not None:
+                logging.info(f"Write-behind buffer statistics: {buffers.stats()}")
+        log_run_summary(len(tickers), succeeded, failed, time.perf_counter() - started, max_workers)
+        publish_read_stores(run_started)
+
+        logging.info("Data ingestion completed successfully.")
 
-        # Fetch all tickers from the database
-        logging.info("Fetching all tickers from the database...")
-        tickers = fetch_all_tickers()
+    except Exception as e:
+        logging.error(f"Failed to complete data ingestion: {e}")
+        raise
 
+    finally:
+        close_connection_pool()
+        write_metrics_textfile()
+
+async def schedule_ingest_data_async(fetch_threads=None):
+    """
+    Asyncio entry point for the ingestion of all tickers in the database.
+    yfinance calls run on fetch_threads executor threads (ASYNC_FETCH_THREADS, default 64),
+    which bound how many tickers are fetched concurrently, and rows are written through
+    the write-behind buffers.
+    """
+    try:
+        start_metrics_server()
+        run_started = datetime.datetime.now(datetime.timezone.utc)
+        tickers = await asyncio.to_thread(prepare_ingest)
         if not tickers:
-            logging.warning("No tickers found in the database. Exiting data ingestion.")
             return
 
-        # Process each ticker sequentially
-        for ticker_data in tickers:
-            process_ticker_data(ticker_data)
+        if fetch_threads is None:
+            fetch_threads = int(os.getenv("ASYNC_FETCH_THREADS", 64))
+        buffers = get_write_buffers(write_behind=True)
+
+        logging.info(f"Processing {len(tickers)} tickers asynchronously with {fetch_threads} fetch threads...")
+        started = time.perf_counter()
+        pending = tickers
+        succeeded = 0
+        for attempt in range(2):
+            done, failed_symbols = await ingest_tickers_async(
+                [ticker_data[1] for ticker_data in pending],
+                fetch_ticker_payloads,
+                buffers.add_ticker,
+                fetch_threads=fetch_threads,
+            )
+            done, failed_symbols = await asyncio.to_thread(collect_flush_failures, buffers, done, failed_symbols)
+            succeeded += done
+            pending = requeue_failed_tickers(pending, failed_symbols) if attempt == 0 else []
+            if not pending:
+                break
+        failed = len(tickers) - succeeded
+        logging.info(f"Write-behind buffer statistics: {buffers.stats()}")
+        log_run_summary(len(tickers), succeeded, failed, time.perf_counter() - started, fetch_threads)
+        await asyncio.to_thread(publish_read_stores, run_started)
 
         logging.info("Data ingestion completed successfully.")
 
@@ -86,5 +382,73 @@ def schedule_ingest_data():
         logging.error(f"Failed to complete data ingestion: {e}")
         raise
 
+    finally:
+        close_connection_pool()
+        write_metrics_textfile()
+
+def schedule_quote_refresh(batch_size=None):
+    """
+    Refresh the price and volume columns of every ticker with batched multi-ticker
+    downloads instead of one fast_info request and UPDATE per symbol.
+    Batches hold batch_size symbols (QUOTE_BATCH_SIZE, default 500).
+    """
+    try:
+        start_metrics_server()
+        tickers = fetch_all_tickers(**ticker_filters())
+        if not tickers:
+            logging.warning("No tickers found in the database. Skipping quote refresh.")
+            return
+
+        if batch_size is None:
+            batch_size = int(os.getenv("QUOTE_BATCH_SIZE", 500))
+        refresh_quotes([ticker_data[1] for ticker_data in tickers], batch_size=batch_size)
+
+    except Exception as e:
+        logging.error(f"Failed to refresh quotes: {e}")
+        raise
+
+    finally:
+        close_connection_pool()
+        write_metrics_textfile()
+
+def schedule_price_ingest(batch_size=None):
+    """
+    Load daily OHLCV history for every ticker over the date range in config/config.yaml,
+    resuming each ticker from its latest stored price.
+    Downloads hold batch_size symbols (PRICE_BATCH_SIZE, default 200). With
+    PRICE_RETENTION_YEARS set, years older than that are not downloaded
+    and their partitions are detached afterwards.
+    """
+    try:
+        start_metrics_server()
+        tickers = fetch_all_tickers(**ticker_filters())
+        if not tickers:
+            logging.warning("No tickers found in the database. Skipping price ingestion.")
+            return
+
+        if batch_size is None:
+            batch_size = int(os.getenv("PRICE_BATCH_SIZE", 200))
+        load_ticker_id_cache()
+        ingest_price_history([ticker_data[1] for ticker_data in tickers], batch_size=batch_size)
+
+        first_year = retention_start_year()
+        if first_year is not None:
+            detach_price_partitions(first_year)
+
+    except Exception as e:
+        logging.error(f"Failed to ingest price history: {e}")
+        raise
+
+    finally:
+        close_connection_pool()
+        write_metrics_textfile()
+
 if __name__ == "__main__":
-    schedule_ingest_data()
+    if env_flag("PRICE_INGEST"):
+        schedule_price_ingest()
+    elif env_flag("QUOTE_REFRESH"):
+        schedule_quote_refresh()
+    elif env_flag("INGEST_ASYNC"):
+        asyncio.run(schedule_ingest_data_async())
+    else:
+        schedule_ingest_data()
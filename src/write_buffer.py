@@ -0,0 +1,126 @@
+import time
+import logging
+import threading
+from db_utils import BULK_WRITERS, fetch_ticker_id, pooled_connection, ticker_payload_rows, write_table_rows
+
+
+class TickerWriteBuffers:
+    """
+    Write-behind buffer for the rows of many tickers, fed with whole ticker payloads.
+
+    Rows accumulate in memory per table and every table is flushed together, in one
+    transaction through write_table_rows, once any table has max_rows pending or the
+    oldest pending row is older than max_age seconds. Watermarks in 'ingestion_state'
+    therefore always commit with the rows they describe. Call flush() at the end of a
+    run to write whatever is left, then take_failed_symbols() for the tickers whose
+    rows were lost to a failed flush, so they can be retried.
+    """
+
+    def __init__(self, max_rows=5000, max_age=30.0):
+        self.max_rows = max_rows
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._rows = self._empty()
+        self._symbols = set()
+        self._failed_symbols = set()
+        self._oldest = None
+        self._stats = {
+            table: {"rows_added": 0, "rows_written": 0, "rows_failed": 0}
+            for table in BULK_WRITERS
+        }
+        self._flushes = 0
+
+    @staticmethod
+    def _empty():
+        # Keyed in BULK_WRITERS order, so ingestion_state is written last
+        return {table: [] for table in BULK_WRITERS}
+
+    def _should_flush(self):
+        if any(len(rows) >= self.max_rows for rows in self._rows.values()):
+            return True
+        return self._oldest is not None and time.monotonic() - self._oldest >= self.max_age
+
+    def _take(self):
+        with self._lock:
+            rows, self._rows, self._oldest = self._rows, self._empty(), None
+            symbols, self._symbols = self._symbols, set()
+        return rows, symbols
+
+    def add_rows(self, table_rows, symbol=None):
+        """
+        Queue rows keyed by table, as returned by db_utils.ticker_payload_rows,
+        flushing if a size or age threshold is reached.
+        """
+        with self._lock:
+            if symbol is not None:
+                self._symbols.add(symbol)
+            for table, rows in table_rows.items():
+                if not rows:
+                    continue
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+                self._rows[table].extend(rows)
+                self._stats[table]["rows_added"] += len(rows)
+            should_flush = self._should_flush()
+        if should_flush:
+            self.flush()
+
+    def add_ticker(self, symbol, payloads):
+        """
+        Map the payloads fetched for one ticker to rows and queue them.
+        """
+        ticker_id = fetch_ticker_id(symbol)
+        if ticker_id is None:
+            raise ValueError(f"Ticker '{symbol}' not found.")
+        self.add_rows(ticker_payload_rows(symbol, payloads, ticker_id), symbol)
+
+    def flush(self):
+        """
+        Write the pending rows of every table in one transaction and return how many were written.
+        A failed flush is logged and counted, and the symbols its rows came from are kept
+        for take_failed_symbols; the rows are dropped so later flushes can proceed.
+        """
+        with self._flush_lock:
+            table_rows, symbols = self._take()
+            count = sum(len(rows) for rows in table_rows.values())
+            if not count:
+                return 0
+            try:
+                with pooled_connection() as conn:
+                    write_table_rows(table_rows, conn)
+            except Exception as e:
+                with self._lock:
+                    for table, rows in table_rows.items():
+                        self._stats[table]["rows_failed"] += len(rows)
+                    self._failed_symbols.update(symbols)
+                logging.error(f"Failed to flush {count} buffered rows of {len(symbols)} tickers: {e}")
+                return 0
+
+            with self._lock:
+                for table, rows in table_rows.items():
+                    self._stats[table]["rows_written"] += len(rows)
+                self._flushes += 1
+            logging.info(f"Flushed {count} buffered rows in one transaction.")
+            return count
+
+    def take_failed_symbols(self):
+        """
+        Return and forget the symbols whose buffered rows were lost to a failed flush.
+        """
+        with self._lock:
+            symbols, self._failed_symbols = self._failed_symbols, set()
+        return symbols
+
+    def stats(self):
+        """
+        Return a snapshot of buffer statistics per table, plus the number of flushes.
+        """
+        with self._lock:
+            stats = {
+                table: dict(table_stats, rows_pending=len(self._rows[table]))
+                for table, table_stats in self._stats.items()
+            }
+            stats["flushes"] = self._flushes
+        return stats